@@ -0,0 +1,554 @@
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+# tp's lazy proxies, so each benchmark only needs the libraries it actually uses
+from tp import cv2, nr
+from tp import mask_to_rgba, grabcut_mask, grabcut_mask_multires, DEFAULT_GRABCUT_SCALE, DEFAULT_GRABCUT_BAND
+from tp import denoise_audio_parallel, estimate_noise_clip
+from tp import prepare_foreground, blend_prepared, resized_background
+import tp
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = ['640x480', '1920x1080', '4000x3000']
+GRABCUT_SIZES = ['640x480', '1920x1080', '3000x2000']
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def synthetic_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+def synthetic_mask(width, height):
+    # Filled ellipse in the middle of the frame, like a centred subject
+    yy, xx = np.ogrid[:height, :width]
+    inside = ((xx - width / 2) / (width / 3)) ** 2 + ((yy - height / 2) / (height / 3)) ** 2 <= 1
+    return inside.astype(np.uint8)
+
+def synthetic_scene(width, height, seed=0):
+    # Noisy gradient backdrop with a differently coloured subject; returns (BGR image, true mask)
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(60, 140, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+    image = np.broadcast_to(ramp, (height, width, 3)).copy()
+    image[:, :, 0] += 40
+    truth = synthetic_mask(width, height)
+    image[truth == 1] = (40, 90, 200)
+    image += rng.normal(0, 12, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8), truth
+
+def iou(a, b):
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+def synthetic_audio(seconds, sr=44100, channels=1, seed=0):
+    # Gated tones buried in white noise, shaped (channels, frames)
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t) * (np.sin(2 * np.pi * 0.2 * t) > 0)
+    audio = tone + 0.05 * rng.standard_normal((channels, len(t)))
+    return audio.astype(np.float32)
+
+def legacy_mask_to_rgba(rgb, mask):
+    # The per-pixel loop remove_background_basic used before vectorization
+    result = rgb * mask[:, :, np.newaxis]
+    image = Image.fromarray(result).convert('RGBA')
+    new_data = []
+    for item in image.getdata():
+        if item[0] == 0 and item[1] == 0 and item[2] == 0:
+            new_data.append((0, 0, 0, 0))
+        else:
+            new_data.append(item)
+    image.putdata(new_data)
+    return image
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_grabcut_alpha(sizes, repeat=3, skip_legacy=False):
+    print(f"{'size':>12} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for width, height in sizes:
+        rgb = synthetic_image(width, height)
+        mask = synthetic_mask(width, height)
+        label = f"{width}x{height}"
+        fast = time_call(mask_to_rgba, rgb, mask, repeat=repeat)
+        if skip_legacy:
+            print(f"{label:>12} {'-':>12} {fast:>15.4f} {'-':>9}")
+            continue
+        slow = time_call(legacy_mask_to_rgba, rgb, mask, repeat=1)
+        print(f"{label:>12} {slow:>12.4f} {fast:>15.4f} {slow / fast:>8.1f}x")
+
+def bench_grabcut_multires(sizes, scale, band, repeat=1):
+    print(f"scale={scale} band={band}px")
+    print(f"{'size':>12} {'full (s)':>10} {'multi-res (s)':>14} {'speedup':>9} "
+          f"{'IoU vs full':>12} {'IoU full/truth':>15} {'IoU multi/truth':>16}")
+    for width, height in sizes:
+        image, truth = synthetic_scene(width, height)
+        full_mask = grabcut_mask(image)
+        fast_mask = grabcut_mask_multires(image, scale, band)
+        full = time_call(grabcut_mask, image, repeat=repeat)
+        fast = time_call(grabcut_mask_multires, image, scale, band, repeat=repeat)
+        label = f"{width}x{height}"
+        print(f"{label:>12} {full:>10.3f} {fast:>14.3f} {full / fast:>8.1f}x "
+              f"{iou(fast_mask, full_mask):>12.4f} {iou(full_mask, truth):>15.4f} {iou(fast_mask, truth):>16.4f}")
+
+def bench_denoise_parallel(seconds, channels, worker_counts, stationary, sr=44100):
+    y = synthetic_audio(seconds, sr, channels)
+    y_in = y[0] if channels == 1 else y
+    noise_clip = estimate_noise_clip(y, sr) if stationary else None
+    
+    start = time.perf_counter()
+    # One true single pass: noisereduce would otherwise chunk long inputs itself
+    reference = nr.reduce_noise(y=y_in, sr=sr, stationary=stationary, y_noise=noise_clip,
+                                chunk_size=y_in.shape[-1] + 1)
+    single = time.perf_counter() - start
+    print(f"{seconds}s x {channels}ch, stationary={stationary}: single pass {single:.2f}s")
+    print(f"{'workers':>8} {'time (s)':>10} {'speedup':>9} {'max |diff|':>11} {'diff SNR (dB)':>14}")
+    
+    for workers in worker_counts:
+        # Warm the pool so process start-up is not charged to the first run
+        denoise_audio_parallel(y_in[..., :sr * 20], sr, workers=workers, stationary=stationary,
+                               noise_clip=noise_clip, segment_seconds=10)
+        start = time.perf_counter()
+        result = denoise_audio_parallel(y_in, sr, workers=workers, stationary=stationary, noise_clip=noise_clip)
+        elapsed = time.perf_counter() - start
+        diff = result - reference
+        snr = 10 * np.log10(np.sum(reference ** 2) / max(np.sum(diff ** 2), 1e-20))
+        print(f"{workers:>8} {elapsed:>10.2f} {single / elapsed:>8.1f}x "
+              f"{np.abs(diff).max():>11.5f} {snr:>14.1f}")
+
+def png_round_trip(image, output):
+    # What remove_image_background_ai used to do around rembg.remove
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    input_bytes = buffer.getvalue()
+    out_buffer = io.BytesIO()
+    output.save(out_buffer, format='PNG')
+    output_bytes = out_buffer.getvalue()
+    decoded = Image.open(io.BytesIO(output_bytes))
+    decoded.load()
+    return len(input_bytes) + len(output_bytes)
+
+def bench_rembg_io(sizes, repeat=3):
+    # The model call is identical on both paths, so time only what the old path added:
+    # PNG-encode the input, and PNG-encode then decode the RGBA result
+    print(f"{'size':>12} {'round trip (ms)':>16} {'extra bytes (MB)':>17}")
+    for width, height in sizes:
+        rgb = synthetic_image(width, height)
+        image = Image.fromarray(rgb)
+        output = mask_to_rgba(rgb, synthetic_mask(width, height))
+        elapsed = time_call(png_round_trip, image, output, repeat=repeat)
+        extra = png_round_trip(image, output)
+        label = f"{width}x{height}"
+        print(f"{label:>12} {1000 * elapsed:>16.1f} {extra / 1024 ** 2:>17.1f}")
+
+def legacy_replace_background(foreground, background):
+    # replace_background before the compositing engine: PIL resize + two pastes
+    background = background.resize(foreground.size)
+    composite = Image.new('RGBA', foreground.size, (255, 255, 255, 255))
+    composite.paste(background, (0, 0))
+    composite.paste(foreground, (0, 0), foreground)
+    return composite
+
+def bench_composite(sizes, backgrounds=20, repeat=3):
+    # One cut-out onto `backgrounds` different backgrounds of twice the target size
+    print(f"{'size':>12} {'legacy (ms/img)':>16} {'engine (ms/img)':>16} {'speedup':>9} {'engine img/s':>13}")
+    for width, height in sizes:
+        rgb = synthetic_image(width, height)
+        alpha = synthetic_mask(width, height) * np.uint8(255)
+        foreground = Image.fromarray(np.dstack([rgb, alpha]))
+        sources = [Image.fromarray(synthetic_image(width * 2, height * 2, seed=i)) for i in range(backgrounds)]
+        
+        def legacy():
+            for source in sources:
+                legacy_replace_background(foreground, source)
+        
+        def engine():
+            prepared = prepare_foreground(rgb, alpha)
+            for source in sources:
+                blend_prepared(prepared, resized_background(source, (width, height)))
+        
+        slow = time_call(legacy, repeat=repeat) / backgrounds
+        engine()  # first pass fills the resized-background cache
+        fast = time_call(engine, repeat=repeat) / backgrounds
+        label = f"{width}x{height}"
+        print(f"{label:>12} {1000 * slow:>16.2f} {1000 * fast:>16.2f} {slow / fast:>8.1f}x {1 / fast:>13.1f}")
+
+STARTUP_PROBE = '''
+import json, time
+start = time.perf_counter()
+import numpy as np
+from PIL import Image
+import tp
+result = {'import_tp': time.perf_counter() - start}
+
+try:
+    import tkinter as tk
+    root = tk.Tk()
+    app = tp.BackgroundRemoverApp(root)
+    root.update()
+    result['first_window'] = time.perf_counter() - start
+    root.destroy()
+except Exception as e:
+    result['first_window'] = None
+    result['window_error'] = str(e)
+
+image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8))
+if tp.CV2_AVAILABLE:
+    t = time.perf_counter()
+    tp.grabcut_remove_background(image)
+    result['first_grabcut'] = time.perf_counter() - t
+if tp.AUDIO_AVAILABLE:
+    t = time.perf_counter()
+    tp.nr.reduce_noise(y=np.random.default_rng(0).standard_normal(22050).astype(np.float32), sr=22050)
+    result['first_denoise'] = time.perf_counter() - t
+if tp.REMBG_AVAILABLE and WITH_MODEL:
+    t = time.perf_counter()
+    try:
+        tp.remove_background_ai(image)
+        result['first_ai'] = time.perf_counter() - t
+    except Exception as e:
+        result['first_ai'] = None
+        result['ai_error'] = str(e)
+print(json.dumps(result))
+'''
+
+def bench_startup(runs=3, with_model=False):
+    # Fresh interpreter per run so nothing is already imported
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    probe = STARTUP_PROBE.replace('WITH_MODEL', repr(with_model))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', probe], cwd=code_dir, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    
+    print(f"{'stage':>15} {'best (s)':>10} {'median (s)':>11}  (time from probe start; first_* are per-call)")
+    for stage in ['import_tp', 'first_window', 'first_grabcut', 'first_denoise', 'first_ai']:
+        values = [sample[stage] for sample in samples if sample.get(stage) is not None]
+        if values:
+            print(f"{stage:>15} {min(values):>10.3f} {float(np.median(values)):>11.3f}")
+        elif stage in samples[0]:
+            print(f"{stage:>15} {'n/a':>10} {'n/a':>11}  {samples[0].get('window_error') or samples[0].get('ai_error', '')}")
+
+# Every processing path the GUI runs, with its own input sizes (images WIDTHxHEIGHT,
+# audio in seconds); GrabCut stays small because full-res GrabCut takes minutes
+SUITE_SIZES = {
+    'ai': ['640x480', '1920x1080', '4000x3000'],
+    'grabcut': ['320x240', '640x480', '1280x720'],
+    'composite': DEFAULT_SIZES,
+    'display': DEFAULT_SIZES,
+    'denoise': ['10', '60', '300'],
+    'denoise-parallel': ['10', '60', '300'],
+    'denoise-profile': ['10', '60', '300'],
+    'denoise-file': ['60', '300', '900'],
+    'denoise-stream': ['60', '300', '900'],
+    'denoise-stream-profile': ['60', '300', '900'],
+}
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+def timed(stages, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+    return result
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def scene_image(size):
+    image, _ = synthetic_scene(*parse_size(size))
+    return Image.fromarray(image[:, :, ::-1].copy())
+
+def run_ai(image, stages):
+    # remove_image_background_ai: cache key, model (mask), cut-out
+    timed(stages, 'cache_key', tp.image_cache_key, image, 'rembg', {'model': tp.DEFAULT_REMBG_MODEL})
+    mask = timed(stages, 'inference', tp.remove_background_ai, image, only_mask=True)
+    empty = Image.new('RGBA', image.size, 0)
+    timed(stages, 'cutout', Image.composite, image.convert('RGBA'), empty, mask)
+
+def run_grabcut(image, stages):
+    # remove_background_basic: cache key, colour conversion, GrabCut, mask -> RGBA
+    timed(stages, 'cache_key', tp.image_cache_key, image, 'grabcut', {'multires': False})
+    rgb = timed(stages, 'to_array', np.asarray, image.convert('RGB'))
+    cv_image = timed(stages, 'to_bgr', cv2.cvtColor, rgb, cv2.COLOR_RGB2BGR)
+    mask = timed(stages, 'grabcut', grabcut_mask, cv_image)
+    timed(stages, 'alpha', mask_to_rgba, rgb, mask)
+
+def setup_composite(size):
+    width, height = parse_size(size)
+    rgb = synthetic_image(width, height)
+    foreground = Image.fromarray(np.dstack([rgb, synthetic_mask(width, height) * np.uint8(255)]))
+    background = Image.fromarray(synthetic_image(width * 2, height * 2, seed=1))
+    return foreground, background
+
+def run_composite(inputs, stages):
+    # replace_background with a cold background cache
+    foreground, background = inputs
+    tp._background_cache.clear()
+    rgba = timed(stages, 'to_array', np.asarray, foreground.convert('RGBA'))
+    resized = timed(stages, 'resize_background', resized_background, background, foreground.size)
+    prepared = timed(stages, 'premultiply', prepare_foreground, rgba[:, :, :3], rgba[:, :, 3])
+    timed(stages, 'blend', blend_prepared, prepared, resized)
+
+def run_display(image, stages):
+    # display_image_on_canvas on a cold display cache
+    timed(stages, 'resample', tp.fit_image, image, tp.DEFAULT_CANVAS_SIZE)
+
+def setup_denoise(size):
+    return synthetic_audio(float(size), 44100, 1)[0]
+
+def run_denoise(y, stages):
+    # remove_audio_noise: cache key, single-pass denoise
+    timed(stages, 'cache_key', tp.audio_cache_key, y, 44100, 'noisereduce', {'stationary': False})
+    timed(stages, 'denoise', nr.reduce_noise, y=y, sr=44100)
+
+def run_denoise_parallel(y, stages):
+    # remove_audio_noise with "Parallel" on: shared noise clip, stationary segments
+    timed(stages, 'cache_key', tp.audio_cache_key, y, 44100, 'noisereduce-parallel', {'stationary': True})
+    timed(stages, 'denoise', denoise_audio_parallel, y, 44100)
+
+def run_denoise_profile(y, stages):
+    # remove_audio_noise with a saved noise profile: measure once, then gate
+    clip = timed(stages, 'noise_clip', estimate_noise_clip, y, 44100)
+    profile = timed(stages, 'profile', tp.compute_noise_profile, clip, 44100)
+    timed(stages, 'gate', tp.apply_noise_profile, y, 44100, profile)
+
+STREAM_SR = 48000
+
+def setup_audio_file(size):
+    # 48 kHz stereo PCM_16 WAV on disk, written in 10 s blocks so the recording is
+    # never in this process's memory; returns (input path, output path)
+    directory = tempfile.mkdtemp(prefix='bench-audio-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    in_path = os.path.join(directory, 'input.wav')
+    with tp.sf.SoundFile(in_path, 'w', STREAM_SR, 2, subtype='PCM_16') as f:
+        remaining, seed = float(size), 0
+        while remaining > 0:
+            block = min(10.0, remaining)
+            f.write(synthetic_audio(block, STREAM_SR, 2, seed=seed).T * 0.9)
+            remaining -= block
+            seed += 1
+    return in_path, os.path.join(directory, 'output.wav')
+
+def run_denoise_file(paths, stages):
+    # The whole-file path long recordings took before the windowed I/O: decode all of
+    # it, stationary denoise against its quietest stretch, encode all of it
+    in_path, out_path = paths
+    y, sr = timed(stages, 'read', tp.sf.read, in_path, dtype='float32', always_2d=True)
+    clip = timed(stages, 'noise_clip', estimate_noise_clip, y.T, sr)
+    result = timed(stages, 'denoise', nr.reduce_noise, y=y.T, sr=sr, y_noise=clip, stationary=True)
+    timed(stages, 'write', tp.sf.write, out_path, result.T, sr, subtype='PCM_16')
+
+def run_denoise_stream(paths, stages):
+    # denoise-stream: memory-mapped input, windowed denoise into a pre-sized memmap.
+    # ru_maxrss also counts the mapped file's resident pages, which are reclaimable
+    timed(stages, 'stream', tp.denoise_audio_file_streaming, *paths)
+
+def run_denoise_stream_profile(paths, stages):
+    # denoise-stream --profile: the same windows through the saved-profile gate
+    y, sr = tp.sf.read(paths[0], frames=STREAM_SR * 10, dtype='float32', always_2d=True)
+    profile = timed(stages, 'profile', tp.compute_noise_profile, estimate_noise_clip(y.T, sr), sr)
+    timed(stages, 'stream', tp.denoise_audio_file_streaming, *paths, profile=profile)
+
+SUITE_PATHS = {
+    'ai': (scene_image, run_ai, 'REMBG_AVAILABLE'),
+    'grabcut': (scene_image, run_grabcut, 'CV2_AVAILABLE'),
+    'composite': (setup_composite, run_composite, None),
+    'display': (scene_image, run_display, None),
+    'denoise': (setup_denoise, run_denoise, 'AUDIO_AVAILABLE'),
+    'denoise-parallel': (setup_denoise, run_denoise_parallel, 'AUDIO_AVAILABLE'),
+    'denoise-profile': (setup_denoise, run_denoise_profile, 'AUDIO_AVAILABLE'),
+    'denoise-file': (setup_audio_file, run_denoise_file, 'AUDIO_AVAILABLE'),
+    'denoise-stream': (setup_audio_file, run_denoise_stream, 'AUDIO_AVAILABLE'),
+    'denoise-stream-profile': (setup_audio_file, run_denoise_stream_profile, 'AUDIO_AVAILABLE'),
+}
+
+def run_suite_case(path, size, repeat):
+    # Runs in its own interpreter (see run_suite) so peak RSS belongs to this case alone
+    setup, run, requirement = SUITE_PATHS[path]
+    if requirement and not getattr(tp, requirement):
+        return {'skipped': f"{requirement} is False"}
+    inputs = setup(size)
+    # ru_maxrss only ever grows, so this is imports + inputs; the case adds to it
+    base_rss = peak_rss_mb()
+    try:
+        # Untimed warm-up: imports, model load, worker pool start-up
+        run(inputs, {})
+    except Exception as e:
+        return {'skipped': f"{type(e).__name__}: {e}"}
+    
+    best = None
+    for _ in range(repeat):
+        stages = {}
+        start = time.perf_counter()
+        run(inputs, stages)
+        wall = time.perf_counter() - start
+        if best is None or wall < best[0]:
+            best = (wall, stages)
+    return {'wall_s': best[0], 'stages_s': best[1], 'base_rss_mb': base_rss, 'peak_rss_mb': peak_rss_mb()}
+
+def run_suite(paths, repeat, quick=False):
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for path in paths:
+        for size in SUITE_SIZES[path][:1] if quick else SUITE_SIZES[path]:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), 'suite-case', path, size,
+                                     '--repeat', str(repeat)], cwd=code_dir, check=True,
+                                    capture_output=True, text=True).stdout
+            result = {'path': path, 'size': size}
+            result.update(json.loads(output.strip().splitlines()[-1]))
+            results.append(result)
+            print_suite_result(result)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+def print_suite_result(result, baseline=None, flags=()):
+    label = f"{result['path']} {result['size']}"
+    if 'skipped' in result:
+        print(f"{label:>22}  skipped: {result['skipped']}")
+        return
+    rss = result['peak_rss_mb']
+    line = f"{label:>22} {1000 * result['wall_s']:>10.1f} ms {rss or 0:>8.0f} MB"
+    if rss and result.get('base_rss_mb'):
+        line += f" (+{rss - result['base_rss_mb']:.0f})"
+    if baseline is not None:
+        line += f"  ({result['wall_s'] / baseline['wall_s']:.2f}x time"
+        if rss and baseline.get('peak_rss_mb'):
+            line += f", {rss / baseline['peak_rss_mb']:.2f}x RSS"
+        line += ")"
+    if flags:
+        line += "  REGRESSION: " + ", ".join(flags)
+    print(line)
+    print(f"{'':>22} " + ", ".join(f"{name} {1000 * t:.1f}" for name, t in result['stages_s'].items()))
+
+def compare_to_baseline(report, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    # Flag any case whose wall time or peak RSS grew by more than `threshold`
+    previous = {(r['path'], r['size']): r for r in baseline['results'] if 'skipped' not in r}
+    regressions = []
+    print(f"\nCompared with baseline from {baseline.get('timestamp', '?')} (threshold {threshold:.0%}):")
+    for result in report['results']:
+        before = previous.get((result['path'], result['size']))
+        if 'skipped' in result or before is None:
+            continue
+        flags = []
+        if result['wall_s'] > before['wall_s'] * (1 + threshold):
+            flags.append('wall time')
+        if (result['peak_rss_mb'] and before.get('peak_rss_mb')
+                and result['peak_rss_mb'] > before['peak_rss_mb'] * (1 + threshold)):
+            flags.append('peak RSS')
+        print_suite_result(result, before, flags)
+        if flags:
+            regressions.append({'path': result['path'], 'size': result['size'], 'flags': flags})
+    print(f"{len(regressions)} regression(s)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the processing paths in tp.py")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    alpha_parser = subparsers.add_parser('grabcut-alpha', help="GrabCut mask -> RGBA conversion, loop vs arrays")
+    alpha_parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="WIDTHxHEIGHT list")
+    alpha_parser.add_argument('--repeat', type=int, default=3)
+    alpha_parser.add_argument('--skip-legacy', action='store_true', help="Only time the vectorized path")
+
+    multires_parser = subparsers.add_parser('grabcut-multires', help="Full-res vs coarse-to-fine GrabCut")
+    multires_parser.add_argument('--sizes', nargs='+', default=GRABCUT_SIZES, help="WIDTHxHEIGHT list")
+    multires_parser.add_argument('--scale', type=float, default=DEFAULT_GRABCUT_SCALE)
+    multires_parser.add_argument('--band', type=int, default=DEFAULT_GRABCUT_BAND)
+    multires_parser.add_argument('--repeat', type=int, default=1)
+
+    denoise_parser = subparsers.add_parser('denoise-parallel', help="Segment-parallel denoising vs single pass")
+    denoise_parser.add_argument('--seconds', type=float, default=600)
+    denoise_parser.add_argument('--channels', type=int, default=1)
+    denoise_parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16, 32])
+    denoise_parser.add_argument('--non-stationary', action='store_true',
+                                help="Per-segment noise tracking (no shared estimate; approximate)")
+
+    io_parser = subparsers.add_parser('rembg-io', help="Cost of the PNG round trip the AI path no longer does")
+    io_parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="WIDTHxHEIGHT list")
+    io_parser.add_argument('--repeat', type=int, default=3)
+
+    composite_parser = subparsers.add_parser('composite', help="Background replacement, PIL paste vs engine")
+    composite_parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES[:2], help="WIDTHxHEIGHT list")
+    composite_parser.add_argument('--backgrounds', type=int, default=20)
+    composite_parser.add_argument('--repeat', type=int, default=3)
+
+    startup_parser = subparsers.add_parser('startup', help="Time to first window and to first result")
+    startup_parser.add_argument('--runs', type=int, default=3)
+    startup_parser.add_argument('--with-model', action='store_true', help="Also time the first AI removal")
+
+    suite_parser = subparsers.add_parser('suite', help="Every processing path at several sizes, "
+                                                       "with stage timings and peak RSS")
+    suite_parser.add_argument('--paths', nargs='+', choices=list(SUITE_PATHS), default=list(SUITE_PATHS))
+    suite_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser.add_argument('--quick', action='store_true', help="Smallest size of each path only")
+    suite_parser.add_argument('-o', '--output', help="Write the results as JSON")
+    suite_parser.add_argument('--baseline', help="Earlier --output file to compare against")
+    suite_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                              help="Relative slow-down / growth that counts as a regression")
+
+    case_parser = subparsers.add_parser('suite-case', help="One suite case (used internally by suite)")
+    case_parser.add_argument('path', choices=list(SUITE_PATHS))
+    case_parser.add_argument('size')
+    case_parser.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'grabcut-alpha':
+        bench_grabcut_alpha([parse_size(size) for size in args.sizes], args.repeat, args.skip_legacy)
+    elif args.command == 'grabcut-multires':
+        bench_grabcut_multires([parse_size(size) for size in args.sizes], args.scale, args.band, args.repeat)
+    elif args.command == 'rembg-io':
+        bench_rembg_io([parse_size(size) for size in args.sizes], args.repeat)
+    elif args.command == 'composite':
+        bench_composite([parse_size(size) for size in args.sizes], args.backgrounds, args.repeat)
+    elif args.command == 'startup':
+        bench_startup(args.runs, args.with_model)
+    elif args.command == 'denoise-parallel':
+        bench_denoise_parallel(args.seconds, args.channels, args.workers, not args.non_stationary)
+    elif args.command == 'suite-case':
+        print(json.dumps(run_suite_case(args.path, args.size, args.repeat)))
+    elif args.command == 'suite':
+        print(f"{'case':>22} {'wall':>13} {'peak RSS':>11}   (stages in ms below each case)")
+        report = run_suite(args.paths, args.repeat, args.quick)
+        if args.baseline:
+            with open(args.baseline) as f:
+                report['regressions'] = compare_to_baseline(report, json.load(f), args.threshold)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        if report.get('regressions'):
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import argparse
+import io
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+from PIL import Image
+
+def synthetic_png(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+    out = io.BytesIO()
+    image.save(out, format='PNG')
+    return out.getvalue()
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float('nan')
+
+def run_load(url, body, concurrency, total_requests, content_type='image/png'):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = [total_requests]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            request = urllib.request.Request(url, data=body, method='POST',
+                                             headers={'Content-Type': content_type})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=300) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except urllib.error.URLError:
+                status = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {
+        'requests': total_requests,
+        'ok': len(latencies),
+        'statuses': statuses,
+        'seconds': wall,
+        'throughput': len(latencies) / wall if wall > 0 else 0.0,
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p99_ms': 1000 * percentile(latencies, 99),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running service.py instance")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--endpoint', default='/remove-background',
+                        help="/remove-background, /grabcut, /composite?background=... or /denoise")
+    parser.add_argument('--file', help="Request body to send (default: a synthetic PNG)")
+    parser.add_argument('--size', default='640x480', help="WIDTHxHEIGHT of the synthetic PNG")
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('-n', '--requests', type=int, default=200, help="Requests per concurrency level")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        with open(args.file, 'rb') as f:
+            body = f.read()
+    else:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        body = synthetic_png(width, height)
+    content_type = 'audio/wav' if args.endpoint.startswith('/denoise') else 'image/png'
+
+    url = args.url.rstrip('/') + args.endpoint
+    print(f"{'concurrency':>11} {'ok':>6} {'503s':>6} {'req/s':>8} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for concurrency in args.concurrency:
+        result = run_load(url, body, concurrency, args.requests, content_type)
+        print(f"{concurrency:>11} {result['ok']:>6} {result['statuses'].get(503, 0):>6} "
+              f"{result['throughput']:>8.1f} {result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f}")
+        other = {k: v for k, v in result['statuses'].items() if k not in (200, 503)}
+        if other:
+            print(f"{'':>11} other statuses: {other}")
+
+if __name__ == "__main__":
+    main()
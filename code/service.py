@@ -0,0 +1,319 @@
+import argparse
+import io
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from PIL import Image, ImageOps
+
+import tp
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 8
+DEFAULT_MAX_WAIT_MS = 10
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MODEL_THREADS = 1
+REQUEST_TIMEOUT = 120
+
+# u2net-family sessions share one pre/post-processing recipe, so several requests can
+# go through a single inference call when the exported model has a free batch axis
+BATCHABLE_MODELS = {'u2net', 'u2netp', 'u2net_human_seg', 'silueta'}
+U2NET_MEAN = (0.485, 0.456, 0.406)
+U2NET_STD = (0.229, 0.224, 0.225)
+U2NET_SIZE = (320, 320)
+
+class ServiceBusy(Exception):
+    pass
+
+class SegmentationUnavailable(Exception):
+    pass
+
+def session_accepts_batches(session):
+    # A fixed batch dimension (an int, e.g. 1) in the model file means onnxruntime
+    # rejects any stacked input; a named or unknown one means it takes any batch size
+    if getattr(session, 'model_name', None) not in BATCHABLE_MODELS or not hasattr(session, 'inner_session'):
+        return False
+    return not isinstance(session.inner_session.get_inputs()[0].shape[0], int)
+
+def predict_masks_batched(session, images):
+    if len(images) == 1 or getattr(session, 'batch_unsupported', False):
+        return [session.predict(image)[0] for image in images]
+
+    from onnxruntime.capi.onnxruntime_pybind11_state import InvalidArgument
+    
+    feeds = [session.normalize(image, U2NET_MEAN, U2NET_STD, U2NET_SIZE) for image in images]
+    input_name = next(iter(feeds[0]))
+    try:
+        outputs = session.inner_session.run(None, {input_name: np.concatenate([f[input_name] for f in feeds])})
+    except InvalidArgument:
+        # Input shape rejected: exported with a fixed batch size of one; stop trying
+        session.batch_unsupported = True
+        return [session.predict(image)[0] for image in images]
+
+    masks = []
+    for pred, image in zip(outputs[0][:, 0, :, :], images):
+        low, high = pred.min(), pred.max()
+        pred = (pred - low) / max(high - low, 1e-6)
+        mask = Image.fromarray((pred.clip(0, 1) * 255).astype(np.uint8))
+        masks.append(mask.resize(image.size, Image.Resampling.LANCZOS))
+    return masks
+
+def apply_mask(image, mask):
+    # Same cut-out rembg produces: colour and alpha both scaled by the mask
+    empty = Image.new('RGBA', image.size, 0)
+    return Image.composite(image.convert('RGBA'), empty, mask)
+
+class SegmentationBatcher:
+    # One or two model threads drain one bounded queue, each taking up to max_batch
+    # requests that arrive within max_wait_ms of the first. Few threads keep requests
+    # together in batches; each inference gets the cores through onnxruntime instead
+    def __init__(self, model_name, model_threads, max_batch, max_wait_ms, queue_size):
+        self.model_threads = model_threads
+        self.session = tp.get_rembg_session(model_name, max(1, (os.cpu_count() or 1) // model_threads))
+        # Without a free batch axis, waiting to fill a batch would only add latency
+        self.batching = session_accepts_batches(self.session)
+        self.max_batch = max_batch if self.batching else 1
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.images = 0
+
+        for _ in range(model_threads):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, image):
+        item = {'image': image, 'done': threading.Event(), 'mask': None, 'error': None}
+        try:
+            self.requests.put_nowait(item)
+        except queue.Full:
+            raise ServiceBusy()
+        if not item['done'].wait(REQUEST_TIMEOUT):
+            raise TimeoutError("Segmentation timed out")
+        if item['error'] is not None:
+            raise item['error']
+        return item['mask']
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                masks = predict_masks_batched(self.session, [item['image'] for item in batch])
+                for item, mask in zip(batch, masks):
+                    item['mask'] = mask
+            except Exception as e:
+                for item in batch:
+                    item['error'] = e
+            for item in batch:
+                item['done'].set()
+
+            with self.lock:
+                self.batches += 1
+                self.images += len(batch)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'batching': self.batching,
+                'model_threads': self.model_threads,
+                'batches': self.batches,
+                'images': self.images,
+                'mean_batch_size': self.images / self.batches if self.batches else 0.0,
+                'queue_depth': self.requests.qsize(),
+            }
+
+class ProcessingService:
+    def __init__(self, model_name=tp.DEFAULT_REMBG_MODEL, workers=None, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, queue_size=DEFAULT_QUEUE_SIZE, model_threads=DEFAULT_MODEL_THREADS):
+        workers = workers or os.cpu_count() or 1
+        self.batcher = None
+        self.segmentation_error = None
+        if tp.REMBG_AVAILABLE:
+            try:
+                self.batcher = SegmentationBatcher(model_name, model_threads, max_batch, max_wait_ms, queue_size)
+            except Exception as e:
+                # e.g. the model can't be downloaded; everything but /remove-background still works
+                self.segmentation_error = f"Could not load rembg model {model_name!r}: {e}"
+        else:
+            self.segmentation_error = "rembg not installed! Run: pip install rembg"
+
+        # GrabCut, compositing and denoising share one bounded pool; past queue_size
+        # pending jobs new requests are turned away instead of piling up
+        self.cpu_pool = ThreadPoolExecutor(max_workers=workers)
+        self.cpu_slots = threading.BoundedSemaphore(queue_size)
+        self.lock = threading.Lock()
+        self.served = {}
+        self.rejected = 0
+
+    def run_cpu_job(self, func, *args):
+        if not self.cpu_slots.acquire(blocking=False):
+            raise ServiceBusy()
+        # The slot is held until the job itself finishes, even if the request times out first
+        try:
+            future = self.cpu_pool.submit(func, *args)
+        except Exception:
+            self.cpu_slots.release()
+            raise
+        future.add_done_callback(lambda future: self.cpu_slots.release())
+        return future.result(REQUEST_TIMEOUT)
+
+    def count(self, endpoint, rejected=False):
+        with self.lock:
+            if rejected:
+                self.rejected += 1
+            else:
+                self.served[endpoint] = self.served.get(endpoint, 0) + 1
+
+    def remove_background(self, image, only_mask=False):
+        if self.batcher is None:
+            raise SegmentationUnavailable(self.segmentation_error)
+        mask = self.batcher.submit(image)
+        return mask if only_mask else apply_mask(image, mask)
+
+    def grabcut(self, image, multires=False):
+        if not tp.CV2_AVAILABLE:
+            raise RuntimeError("OpenCV not installed! Run: pip install opencv-python")
+        return self.run_cpu_job(tp.grabcut_remove_background, image, 5, multires)
+
+    def composite(self, foreground, background_path):
+        return self.run_cpu_job(tp.composite_image, foreground, background_path)
+
+    def denoise(self, audio_bytes, stationary=False):
+        if not tp.AUDIO_AVAILABLE:
+            raise RuntimeError("Audio libraries not installed!")
+
+        def job():
+            y, sr = tp.sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=True)
+            denoised = tp.nr.reduce_noise(y=y.T, sr=sr, stationary=stationary)
+            out = io.BytesIO()
+            tp.sf.write(out, np.asarray(denoised).T, sr, format='WAV', subtype='FLOAT')
+            return out.getvalue()
+
+        return self.run_cpu_job(job)
+
+    def stats(self):
+        with self.lock:
+            stats = {'served': dict(self.served), 'rejected': self.rejected}
+        if self.batcher is not None:
+            stats['segmentation'] = self.batcher.stats()
+        else:
+            stats['segmentation_error'] = self.segmentation_error
+        return stats
+
+def encode_png(image):
+    out = io.BytesIO()
+    image.save(out, format='PNG', compress_level=1)
+    return out.getvalue()
+
+def decode_image(body):
+    image = Image.open(io.BytesIO(body))
+    return ImageOps.exif_transpose(image)
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status, payload, headers=None):
+            self.send_body(status, json.dumps(payload).encode(), 'application/json', headers)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                self.send_json(200, {'status': 'ok'})
+            elif path == '/stats':
+                self.send_json(200, service.stats())
+            else:
+                self.send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            flag = lambda name: params.get(name, '0').lower() in ('1', 'true', 'yes')
+
+            try:
+                if url.path == '/remove-background':
+                    result = service.remove_background(decode_image(body), only_mask=flag('mask'))
+                    self.send_body(200, encode_png(result), 'image/png')
+                elif url.path == '/grabcut':
+                    result = service.grabcut(decode_image(body), multires=flag('multires'))
+                    self.send_body(200, encode_png(result), 'image/png')
+                elif url.path == '/composite':
+                    if 'background' not in params:
+                        raise ValueError("Missing ?background=<path to background image>")
+                    result = service.composite(decode_image(body), params['background'])
+                    self.send_body(200, encode_png(result), 'image/png')
+                elif url.path == '/denoise':
+                    result = service.denoise(body, stationary=flag('stationary'))
+                    self.send_body(200, result, 'audio/wav')
+                else:
+                    self.send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+                    return
+                service.count(url.path)
+            except ServiceBusy:
+                service.count(url.path, rejected=True)
+                self.send_json(503, {'error': "Server busy, retry later"}, {'Retry-After': '1'})
+            except SegmentationUnavailable as e:
+                self.send_json(503, {'error': str(e)})
+            except (ValueError, OSError) as e:
+                self.send_json(400, {'error': str(e)})
+            except Exception as e:
+                self.send_json(500, {'error': str(e)})
+
+    return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for background removal, compositing and denoising")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-m', '--model', default=tp.DEFAULT_REMBG_MODEL, help="rembg model name")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Threads for GrabCut, compositing and denoising jobs (default: one per CPU core)")
+    parser.add_argument('--model-threads', type=int, choices=[1, 2], default=DEFAULT_MODEL_THREADS,
+                        help="Threads running segmentation batches; each gets cores / model-threads for inference")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    service = ProcessingService(args.model, args.workers, args.max_batch, args.max_wait_ms, args.queue_size,
+                                model_threads=args.model_threads)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
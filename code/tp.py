@@ -1,31 +1,1881 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
 import threading
+import queue
 import os
+import sys
+import time
+import argparse
+import csv
+import hashlib
+import importlib
+import importlib.util
+import json
+import multiprocessing
+import struct
+import tempfile
+import warnings
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 import numpy as np
-from PIL import Image, ImageTk
-import io
+from PIL import Image
 
-# Try to import optional modules
+# The processing functions and the CLI work without Tk; only the window needs it
 try:
-    import librosa
-    import soundfile as sf
-    import noisereduce as nr
-    AUDIO_AVAILABLE = True
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, simpledialog
+    from PIL import ImageTk
+    TK_AVAILABLE = True
 except ImportError:
-    AUDIO_AVAILABLE = False
+    TK_AVAILABLE = False
 
-try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
+class LazyModule:
+    # Stands in for a heavy optional module and imports it on first attribute access,
+    # so the window can appear before librosa/rembg/cv2 have loaded
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def _import(self):
+        # Underscored so it cannot shadow a module function such as librosa.load
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+    
+    def __getattr__(self, attr):
+        return getattr(self._import(), attr)
 
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
+def module_available(*names):
+    # Spec lookup only; nothing is imported
+    return all(importlib.util.find_spec(name) is not None for name in names)
+
+# Detect optional modules without importing them
+AUDIO_AVAILABLE = module_available('librosa', 'soundfile', 'noisereduce')
+REMBG_AVAILABLE = module_available('rembg')
+CV2_AVAILABLE = module_available('cv2')
+TIFF_AVAILABLE = module_available('tifffile')
+
+librosa = LazyModule('librosa')
+sf = LazyModule('soundfile')
+nr = LazyModule('noisereduce')
+rembg = LazyModule('rembg')
+onnxruntime = LazyModule('onnxruntime')
+cv2 = LazyModule('cv2')
+tifffile = LazyModule('tifffile')
+scipy_signal = LazyModule('scipy.signal')
+scipy_ndimage = LazyModule('scipy.ndimage')
+scipy_wavfile = LazyModule('scipy.io.wavfile')
+
+def prefetch_modules(model_name=None):
+    # Warm the heavy imports (and optionally the segmentation model) in the background
+    # so the first click does not pay for them
+    modules = []
+    if CV2_AVAILABLE:
+        modules.append(cv2)
+    if REMBG_AVAILABLE:
+        modules.append(rembg)
+    if AUDIO_AVAILABLE:
+        modules.extend([sf, nr, librosa])
+    for module in modules:
+        try:
+            module._import()
+        except Exception:
+            pass
+    if model_name and REMBG_AVAILABLE:
+        try:
+            get_rembg_session(model_name)
+        except Exception:
+            pass
+
+DEFAULT_REMBG_MODEL = "u2net"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif')
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+# Segmentation models are loaded once per process and reused for every image
+_rembg_sessions = {}
+_rembg_sessions_lock = threading.Lock()
+
+def get_rembg_session(model_name=DEFAULT_REMBG_MODEL, threads=None):
+    # One session per model and thread cap; `threads` limits onnxruntime's pools for
+    # that session alone, so callers running several inferences at once don't
+    # oversubscribe the cores (or change anything for the rest of the process)
+    key = (model_name, threads)
+    with _rembg_sessions_lock:
+        session = _rembg_sessions.get(key)
+        if session is None:
+            sess_opts = None
+            if threads:
+                sess_opts = onnxruntime.SessionOptions()
+                sess_opts.intra_op_num_threads = threads
+                sess_opts.inter_op_num_threads = threads
+            session = rembg.new_session(model_name, sess_opts=sess_opts)
+            _rembg_sessions[key] = session
+        return session
+
+def remove_background_ai(image, model_name=DEFAULT_REMBG_MODEL, only_mask=False, threads=None):
+    # Hand the PIL image straight to rembg and get a PIL image back; no PNG
+    # encode/decode on either side. With only_mask=True the result is the
+    # 'L' alpha mask alone, for callers that composite themselves.
+    return rembg.remove(image, session=get_rembg_session(model_name, threads), only_mask=only_mask)
+
+def collect_image_paths(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(item, name))
+        else:
+            paths.append(item)
+    return paths
+
+def _batch_output_paths(paths, output_dir, extension='.png'):
+    # One output per input in output_dir, disambiguating inputs that share a base name.
+    # extension=None keeps each input's own extension
+    used = set()
+    outputs = []
+    for path in paths:
+        stem, own_extension = os.path.splitext(os.path.basename(path))
+        suffix = own_extension if extension is None else extension
+        name = stem + suffix
+        index = 1
+        while name in used:
+            name = f"{stem}_{index}{suffix}"
+            index += 1
+        used.add(name)
+        outputs.append(os.path.join(output_dir, name))
+    return outputs
+
+def _check_outputs_not_inputs(paths, outputs):
+    # Refuse up front, before anything is written, to replace any file that is also
+    # an input (not only an output's own input: a.jpg's a.png may be another input)
+    inputs = set()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            inputs.add((stat.st_dev, stat.st_ino))
+    for out_path in outputs:
+        if os.path.exists(out_path):
+            stat = os.stat(out_path)
+            if (stat.st_dev, stat.st_ino) in inputs:
+                raise ValueError(f"Output {out_path!r} would overwrite an input; choose another output directory")
+
+def _init_batch_worker(model_name, threads_per_worker):
+    # Stop every worker's onnxruntime from spinning up one thread per core
+    os.environ['OMP_NUM_THREADS'] = str(threads_per_worker)
+    get_rembg_session(model_name)
+
+def _batch_remove_one(job):
+    in_path, out_path, model_name = job
+    try:
+        with open(in_path, 'rb') as f:
+            data = f.read()
+        output = rembg.remove(data, session=get_rembg_session(model_name))
+        with open(out_path, 'wb') as f:
+            f.write(output)
+        return in_path, None
+    except Exception as e:
+        return in_path, str(e)
+
+def batch_remove_backgrounds(inputs, output_dir, model_name=DEFAULT_REMBG_MODEL, workers=None, progress=None):
+    if not REMBG_AVAILABLE:
+        raise RuntimeError("rembg not installed! Run: pip install rembg")
+
+    paths = collect_image_paths(inputs)
+    outputs = _batch_output_paths(paths, output_dir)
+    _check_outputs_not_inputs(paths, outputs)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, out_path, model_name) for path, out_path in zip(paths, outputs)]
+
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, len(jobs) or 1))
+    threads_per_worker = max(1, cpu_count // workers)
+
+    failed = []
+    done = 0
+    start = time.perf_counter()
+    # Spawn rather than fork: forking after rembg has started numba's thread pool deadlocks
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_batch_worker,
+                             initargs=(model_name, threads_per_worker)) as pool:
+        for in_path, error in pool.map(_batch_remove_one, jobs):
+            done += 1
+            if error is not None:
+                failed.append((in_path, error))
+            if progress is not None:
+                progress(done, len(jobs), in_path, error)
+    elapsed = time.perf_counter() - start
+
+    processed = len(jobs) - len(failed)
+    return {
+        'processed': processed,
+        'failed': failed,
+        'workers': workers,
+        'seconds': elapsed,
+        'images_per_sec': processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+DEFAULT_GRABCUT_SCALE = 0.25
+DEFAULT_GRABCUT_BAND = 16
+DEFAULT_GRABCUT_TILE = 256
+
+def grabcut_rect(width, height):
+    # Define rectangle around the subject (simple heuristic); narrower margins on
+    # images too small for 50 px ones
+    margin_x, margin_y = min(50, width // 4), min(50, height // 4)
+    return (margin_x, margin_y, width - 2 * margin_x, height - 2 * margin_y)
+
+def scaled_grabcut_rect(size, full_size):
+    # The full image's rectangle mapped onto a resized copy of it (a preview or
+    # working copy), so both see the subject inside the same margins
+    scale_x, scale_y = size[0] / full_size[0], size[1] / full_size[1]
+    x, y, w, h = grabcut_rect(*full_size)
+    return (int(round(x * scale_x)), int(round(y * scale_y)),
+            max(1, int(round(w * scale_x))), max(1, int(round(h * scale_y))))
+
+def grabcut_mask(cv_image, iterations=5, rect=None):
+    # Simple background removal using GrabCut
+    height, width = cv_image.shape[:2]
+    if rect is None:
+        rect = grabcut_rect(width, height)
+    
+    # Create mask
+    mask = np.zeros((height, width), np.uint8)
+    
+    # Initialize foreground and background models
+    bgd_model = np.zeros((1, 65), np.float64)
+    fgd_model = np.zeros((1, 65), np.float64)
+    
+    # Apply GrabCut
+    cv2.grabCut(cv_image, mask, rect, bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_RECT)
+    
+    # Collapse definite/probable labels into a 0/1 foreground mask
+    return ((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD)).astype(np.uint8)
+
+def grabcut_mask_multires(cv_image, scale=DEFAULT_GRABCUT_SCALE, band=DEFAULT_GRABCUT_BAND,
+                          iterations=5, refine_iterations=2, tile=DEFAULT_GRABCUT_TILE, rect=None):
+    height, width = cv_image.shape[:2]
+    if rect is None:
+        rect = grabcut_rect(width, height)
+    
+    # Coarse pass: full GrabCut on a downscaled copy
+    small_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    small = cv2.resize(cv_image, small_size, interpolation=cv2.INTER_AREA)
+    small_rect = tuple(max(1, int(round(v * scale))) for v in rect)
+    coarse = grabcut_mask(small, iterations, small_rect)
+    del small
+    
+    mask = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_NEAREST)
+    return grabcut_refine_mask(cv_image, mask, band, refine_iterations, tile, rect)
+
+def grabcut_refine_mask(cv_image, mask, band=DEFAULT_GRABCUT_BAND, refine_iterations=2,
+                        tile=DEFAULT_GRABCUT_TILE, rect=None):
+    height, width = cv_image.shape[:2]
+    if rect is None:
+        rect = grabcut_rect(width, height)
+    mask = mask.copy()
+    if band <= 0 or not mask.any() or mask.all():
+        return mask
+    
+    # Everything further than `band` pixels from the edge of the starting mask keeps its
+    # label; only the band in between is left for GrabCut to decide at full resolution
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * band + 1, 2 * band + 1))
+    sure_fg = cv2.erode(mask, kernel)
+    maybe_fg = cv2.dilate(mask, kernel)
+    
+    gc_mask = np.full((height, width), cv2.GC_BGD, np.uint8)
+    gc_mask[maybe_fg == 1] = cv2.GC_PR_BGD
+    gc_mask[mask == 1] = cv2.GC_PR_FGD
+    gc_mask[sure_fg == 1] = cv2.GC_FGD
+    x, y, w, h = rect
+    outside = np.ones((height, width), bool)
+    outside[max(y, 0):y + h, max(x, 0):x + w] = False
+    gc_mask[outside] = cv2.GC_BGD
+    
+    # Refine tile by tile, skipping tiles the band does not touch; each tile carries a
+    # `band` margin of context so the colour models see both sides of the edge
+    uncertain = (gc_mask == cv2.GC_PR_BGD) | (gc_mask == cv2.GC_PR_FGD)
+    for top in range(0, height, tile):
+        for left in range(0, width, tile):
+            bottom, right = min(top + tile, height), min(left + tile, width)
+            if not uncertain[top:bottom, left:right].any():
+                continue
+            y0, y1 = max(top - band, 0), min(bottom + band, height)
+            x0, x1 = max(left - band, 0), min(right + band, width)
+            roi_mask = gc_mask[y0:y1, x0:x1].copy()
+            # GrabCut's colour models need a handful of samples on each side
+            fg_count = np.count_nonzero((roi_mask == cv2.GC_FGD) | (roi_mask == cv2.GC_PR_FGD))
+            if min(fg_count, roi_mask.size - fg_count) < 32:
+                continue
+            
+            bgd_model = np.zeros((1, 65), np.float64)
+            fgd_model = np.zeros((1, 65), np.float64)
+            roi = np.ascontiguousarray(cv_image[y0:y1, x0:x1])
+            cv2.grabCut(roi, roi_mask, None, bgd_model, fgd_model, refine_iterations, cv2.GC_INIT_WITH_MASK)
+            
+            refined = (roi_mask == cv2.GC_FGD) | (roi_mask == cv2.GC_PR_FGD)
+            mask[top:bottom, left:right] = refined[top - y0:bottom - y0, left - x0:right - x0]
+    return mask
+
+def mask_to_rgba(rgb, mask):
+    # Build the RGBA result straight from the 0/1 mask: background pixels become
+    # (0, 0, 0, 0) and foreground keeps full opacity, even where it is pure black
+    rgba = np.empty(rgb.shape[:2] + (4,), np.uint8)
+    np.multiply(rgb, mask[:, :, np.newaxis], out=rgba[:, :, :3])
+    np.multiply(mask, 255, out=rgba[:, :, 3])
+    return Image.fromarray(rgba)
+
+def grabcut_remove_background(image, iterations=5, multires=False,
+                              scale=DEFAULT_GRABCUT_SCALE, band=DEFAULT_GRABCUT_BAND, rect=None):
+    rgb = np.asarray(image.convert('RGB'))
+    
+    # Convert PIL to OpenCV format
+    cv_image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    if multires:
+        mask = grabcut_mask_multires(cv_image, scale, band, iterations, rect=rect)
+    else:
+        mask = grabcut_mask(cv_image, iterations, rect)
+    del cv_image
+    
+    return mask_to_rgba(rgb, mask)
+
+def save_image_file(image, path):
+    # Convert RGBA to RGB (on white) if saving as JPEG
+    if os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg') and image.mode == 'RGBA':
+        rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+        rgb_image.paste(image, mask=image.split()[-1])
+        image = rgb_image
+    image.save(path)
+
+DEFAULT_CANVAS_SIZE = (400, 300)
+
+def fit_image(image, size):
+    # Scale to fit inside size keeping the aspect ratio. reducing_gap lets Pillow
+    # shrink by an integer factor first, so big photos are not LANCZOS-filtered in full
+    width, height = size
+    ratio = min(width / image.width, height / image.height)
+    new_size = (max(1, int(image.width * ratio)), max(1, int(image.height * ratio)))
+    return image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+BACKGROUND_CACHE_SIZE = 32
+
+# Resized backgrounds keyed by (path or image id, size); the source is kept
+# alongside each entry so an image id cannot be recycled while it is cached
+_background_cache = OrderedDict()
+_background_cache_lock = threading.Lock()
+
+def resized_background(background, size):
+    # background is a file path or a PIL image; returns a read-only RGB uint8 array
+    key = (background if isinstance(background, str) else id(background), tuple(size))
+    with _background_cache_lock:
+        entry = _background_cache.get(key)
+        if entry is not None:
+            _background_cache.move_to_end(key)
+            return entry[1]
+    
+    source = Image.open(background) if isinstance(background, str) else background
+    if CV2_AVAILABLE:
+        rgb = np.asarray(source.convert('RGB'))
+        shrinking = size[0] * size[1] < rgb.shape[0] * rgb.shape[1]
+        resized = cv2.resize(rgb, tuple(size), interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC)
+    else:
+        resized = np.array(source.convert('RGB').resize(tuple(size), Image.Resampling.BICUBIC))
+    resized.flags.writeable = False
+    
+    with _background_cache_lock:
+        _background_cache[key] = (background, resized)
+        while len(_background_cache) > BACKGROUND_CACHE_SIZE:
+            _background_cache.popitem(last=False)
+    return resized
+
+def prepare_foreground(rgb, alpha):
+    # Premultiply once so the same cut-out can be dropped onto any number of backgrounds.
+    # 255 * 255 fits in uint16, so the whole blend stays in integer arithmetic.
+    a = alpha.astype(np.uint16)[:, :, np.newaxis]
+    premultiplied = rgb.astype(np.uint16)
+    premultiplied *= a
+    return premultiplied, 255 - a
+
+def blend_prepared(prepared, background):
+    # out = (fg * a + bg * (255 - a)) / 255, rounded; background is an image array or a colour
+    premultiplied, inverse_alpha = prepared
+    out = np.multiply(background, inverse_alpha, dtype=np.uint16)
+    out += premultiplied
+    out += 128
+    out += out >> 8
+    out >>= 8
+    return out.astype(np.uint8)
+
+def composite_image(foreground, background):
+    # foreground is an RGBA cut-out, background a path or PIL image stretched to fit
+    rgba = np.asarray(foreground.convert('RGBA'))
+    prepared = prepare_foreground(rgba[:, :, :3], rgba[:, :, 3])
+    return Image.fromarray(blend_prepared(prepared, resized_background(background, foreground.size)))
+
+def _composite_one_foreground(fg_path, backgrounds, output_paths, image_format):
+    foreground = Image.open(fg_path)
+    rgba = np.asarray(foreground.convert('RGBA'))
+    prepared = prepare_foreground(rgba[:, :, :3], rgba[:, :, 3])
+    for background, out_path in zip(backgrounds, output_paths):
+        result = Image.fromarray(blend_prepared(prepared, resized_background(background, foreground.size)))
+        if image_format == 'png':
+            # Fast zlib level; the composite is written once and read by other tools
+            result.save(out_path, format='PNG', compress_level=1)
+        else:
+            result.save(out_path, format='JPEG', quality=92)
+    return len(output_paths)
+
+def composite_batch(foregrounds, backgrounds, output_dir, workers=None, image_format='png', progress=None):
+    # Every foreground onto every background: one foreground and many backgrounds,
+    # many foregrounds and one background, or any mix of the two
+    extension = 'png' if image_format == 'png' else 'jpg'
+    
+    # Stems made unique first, so same-named files from different directories don't collide
+    fg_stems = [os.path.basename(path) for path in _batch_output_paths(foregrounds, output_dir, extension='')]
+    bg_stems = [os.path.basename(path) for path in _batch_output_paths(backgrounds, output_dir, extension='')]
+    jobs = []
+    for fg_path, fg_stem in zip(foregrounds, fg_stems):
+        outputs = []
+        for bg_stem in bg_stems:
+            name = f"{fg_stem}__{bg_stem}.{extension}" if len(backgrounds) > 1 else f"{fg_stem}.{extension}"
+            outputs.append(os.path.join(output_dir, name))
+        jobs.append((fg_path, outputs))
+    _check_outputs_not_inputs(list(foregrounds) + list(backgrounds),
+                              [out_path for _, outputs in jobs for out_path in outputs])
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # NumPy, cv2 and the PIL codecs release the GIL on big buffers, so threads scale
+    # without pickling images between processes
+    done = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_composite_one_foreground, fg_path, backgrounds, outputs, image_format)
+                   for fg_path, outputs in jobs]
+        for future in futures:
+            done += future.result()
+            if progress is not None:
+                progress(done, len(foregrounds) * len(backgrounds))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'composites': done,
+        'seconds': elapsed,
+        'composites_per_sec': done / elapsed if elapsed > 0 else 0.0,
+    }
+
+VIDEO_FOURCC = {'.mp4': 'mp4v', '.m4v': 'mp4v', '.mov': 'mp4v', '.avi': 'MJPG', '.mkv': 'mp4v'}
+DEFAULT_VIDEO_QUEUE_SIZE = 8
+# Thresholds on _frame_change. Codec noise on a static shot stays around 1; an edge
+# moving 1 px changes its cells by about 7, 8 px by about 40-50 at high contrast
+DEFAULT_MASK_REUSE_THRESHOLD = 4.0
+DEFAULT_MASK_PROPAGATE_THRESHOLD = 40.0
+DEFAULT_MASK_MAX_REUSE = 30
+VIDEO_SIGNATURE_CELL = 16
+
+def _frame_signature(frame):
+    # Colour thumbnail, one pixel per 16x16 cell, used to tell how much a frame
+    # differs from the last keyframe
+    height, width = frame.shape[:2]
+    size = (max(1, width // VIDEO_SIGNATURE_CELL), max(1, height // VIDEO_SIGNATURE_CELL))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+def _frame_change(signature, key_signature):
+    # Largest change of any cell in any colour channel. A subject moving a few pixels
+    # shows up in the cells it crosses instead of being averaged away over the frame,
+    # and a subject with the background's grey level still differs in colour
+    return float(np.abs(signature - key_signature).max())
+
+def segment_frame(frame, backend, model_name=DEFAULT_REMBG_MODEL, multires=False):
+    # frame is BGR; returns a uint8 0/1 mask (grabcut) or 0..255 alpha (ai), both as uint8 arrays
+    if backend == 'ai':
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return np.asarray(remove_background_ai(Image.fromarray(rgb), model_name, only_mask=True))
+    if multires:
+        return grabcut_mask_multires(frame) * np.uint8(255)
+    return grabcut_mask(frame) * np.uint8(255)
+
+def composite_frame(frame, alpha, background):
+    # Blend the subject over a BGR background (flat colour or full frame); alpha is 0..255 uint8
+    return blend_prepared(prepare_foreground(frame, alpha), background)
+
+def remove_video_background(in_path, out_path, backend='ai', model_name=DEFAULT_REMBG_MODEL,
+                            background_color=(0, 255, 0), background_image=None, multires=False,
+                            reuse_threshold=DEFAULT_MASK_REUSE_THRESHOLD,
+                            propagate_threshold=DEFAULT_MASK_PROPAGATE_THRESHOLD,
+                            max_reuse=DEFAULT_MASK_MAX_REUSE,
+                            queue_size=DEFAULT_VIDEO_QUEUE_SIZE, progress=None):
+    capture = cv2.VideoCapture(in_path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Cannot open video: {in_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    fourcc = VIDEO_FOURCC.get(os.path.splitext(out_path)[1].lower(), 'mp4v')
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        capture.release()
+        raise RuntimeError(f"Cannot open video writer for: {out_path}")
+    
+    # A replacement image is resized once for the whole clip
+    if background_image is not None:
+        background = np.ascontiguousarray(resized_background(background_image, (width, height))[:, :, ::-1])
+    else:
+        background = np.array(background_color[::-1], np.uint8)  # RGB -> BGR
+    
+    # decode -> segment/composite -> encode, with bounded queues between the stages
+    # so only a handful of frames are ever held in memory
+    decoded = queue.Queue(maxsize=queue_size)
+    finished = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    timings = {'decode': 0.0, 'segment': 0.0, 'composite': 0.0, 'encode': 0.0}
+    errors = []
+    
+    def put(q, item):
+        # Give up if the other side has failed rather than blocking forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+    
+    def read_frames():
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                ok, frame = capture.read()
+                timings['decode'] += time.perf_counter() - start
+                if not ok or not put(decoded, frame):
+                    break
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(decoded, None)
+    
+    def write_frames():
+        try:
+            while True:
+                frame = get(finished)
+                if frame is None:
+                    break
+                start = time.perf_counter()
+                writer.write(frame)
+                timings['encode'] += time.perf_counter() - start
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+    
+    reader = threading.Thread(target=read_frames, daemon=True)
+    writer_thread = threading.Thread(target=write_frames, daemon=True)
+    reader.start()
+    writer_thread.start()
+    
+    counts = {'segmented': 0, 'propagated': 0, 'reused': 0}
+    key_signature = None
+    alpha = None
+    since_key = 0
+    frames = 0
+    start_time = time.perf_counter()
+    try:
+        while True:
+            frame = get(decoded)
+            if frame is None:
+                break
+            
+            start = time.perf_counter()
+            signature = _frame_signature(frame)
+            change = _frame_change(signature, key_signature) if key_signature is not None else None
+            if change is not None and change <= reuse_threshold and since_key < max_reuse:
+                # Static shot: keep the previous mask as is
+                counts['reused'] += 1
+                since_key += 1
+            elif (change is not None and change <= propagate_threshold and since_key < max_reuse
+                    and backend == 'grabcut'):
+                # Small motion: let GrabCut re-decide only a band around the previous edge
+                alpha = grabcut_refine_mask(frame, (alpha > 127).astype(np.uint8), refine_iterations=1) * np.uint8(255)
+                key_signature = signature
+                counts['propagated'] += 1
+                since_key += 1
+            else:
+                alpha = segment_frame(frame, backend, model_name, multires)
+                key_signature = signature
+                counts['segmented'] += 1
+                since_key = 0
+            timings['segment'] += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            out = composite_frame(frame, alpha, background)
+            timings['composite'] += time.perf_counter() - start
+            
+            if not put(finished, out):
+                break
+            frames += 1
+            if progress is not None:
+                progress(frames, total)
+    except Exception:
+        stop.set()
+        raise
+    finally:
+        put(finished, None)
+        reader.join()
+        writer_thread.join()
+        capture.release()
+        writer.release()
+    
+    if errors:
+        raise errors[0]
+    
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'stage_ms_per_frame': {stage: 1000.0 * t / max(frames, 1) for stage, t in timings.items()},
+    }
+    stats.update(counts)
+    return stats
+
+DEFAULT_WORKING_SIZE = 2048
+# GrabCut's graph costs a few hundred bytes per pixel, so it gets a smaller working copy
+DEFAULT_GRABCUT_WORKING_SIZE = 1024
+DEFAULT_LARGE_TILE = 512
+LARGE_IMAGE_PIXELS = 40_000_000
+STRIP_ROWS = 256
+
+def open_large_image(path):
+    # Full-resolution pixels as an (H, W, C) uint8 array backed by a file, so tiles
+    # can be read later without holding the whole image in RAM.
+    # TIFF scans are decoded by tifffile straight into a memory map; planar ones
+    # (samples, H, W) are returned as an (H, W, samples) view of it. Other formats
+    # cost one full decode in RAM (PIL can't decode them region by region) and are
+    # converted and copied to a temporary memory map strip by strip.
+    if TIFF_AVAILABLE and path.lower().endswith(('.tif', '.tiff')):
+        with tifffile.TiffFile(path) as tif:
+            series = tif.series[0]
+            axes, shape, dtype = series.axes, series.shape, series.dtype
+        samples = shape[axes.index('S')] if 'S' in axes else 1
+        if dtype == np.uint8 and axes in ('YX', 'YXS', 'SYX') and samples in (1, 3, 4):
+            pixels = tifffile.imread(path, out='memmap')
+            return np.moveaxis(pixels, 0, -1) if axes == 'SYX' else pixels
+    
+    previous_limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None  # large scans trip PIL's decompression-bomb guard
+    try:
+        image = Image.open(path)
+        image.load()
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous_limit
+    mode = image.mode
+    if mode not in ('RGB', 'RGBA'):
+        mode = 'RGBA' if 'A' in image.getbands() else 'RGB'
+    width, height = image.size
+    pixels = np.memmap(tempfile.TemporaryFile(), dtype=np.uint8, mode='w+',
+                       shape=(height, width, len(mode)))
+    for top in range(0, height, STRIP_ROWS):
+        bottom = min(top + STRIP_ROWS, height)
+        pixels[top:bottom] = np.asarray(image.crop((0, top, width, bottom)).convert(mode))
+    del image
+    return pixels
+
+def _rgb_view(pixels, top, bottom, left, right):
+    region = np.asarray(pixels[top:bottom, left:right])
+    if region.ndim == 2:
+        return np.repeat(region[:, :, np.newaxis], 3, axis=2)
+    return region[:, :, :3]
+
+def working_copy(pixels, max_size=DEFAULT_WORKING_SIZE):
+    # Block-average down by an integer factor, one strip at a time
+    height, width = pixels.shape[:2]
+    factor = max(1, -(-max(height, width) // max_size))
+    out_h, out_w = height // factor, width // factor
+    proxy = np.empty((out_h, out_w, 3), np.uint8)
+    rows = max(1, STRIP_ROWS // factor)
+    for row in range(0, out_h, rows):
+        row_end = min(row + rows, out_h)
+        strip = _rgb_view(pixels, row * factor, row_end * factor, 0, out_w * factor).astype(np.float32)
+        strip = strip.reshape(row_end - row, factor, out_w, factor, 3).mean(axis=(1, 3))
+        proxy[row:row_end] = np.round(strip).astype(np.uint8)
+    return proxy, factor
+
+def _upsample_mask_tile(mask, factor, top, bottom, left, right):
+    # Bilinear sample of the working-resolution mask at full-resolution pixel centres,
+    # so neighbouring tiles line up exactly
+    map_x = ((np.arange(left, right, dtype=np.float32) + 0.5) / factor - 0.5)[np.newaxis, :]
+    map_y = ((np.arange(top, bottom, dtype=np.float32) + 0.5) / factor - 0.5)[:, np.newaxis]
+    map_x = np.broadcast_to(map_x, (bottom - top, right - left)).astype(np.float32)
+    map_y = np.broadcast_to(map_y, (bottom - top, right - left)).astype(np.float32)
+    return cv2.remap(mask, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+def remove_background_large(in_path, out_path, backend='ai', model_name=DEFAULT_REMBG_MODEL,
+                            working_size=None, tile=DEFAULT_LARGE_TILE, progress=None):
+    # Mask at working resolution, then cut out tile by tile into a tiled BigTIFF;
+    # peak memory is the working copy plus a few tiles
+    if not TIFF_AVAILABLE:
+        raise RuntimeError("tifffile not installed! Run: pip install tifffile")
+    if not out_path.lower().endswith(('.tif', '.tiff')):
+        raise ValueError("Large-image output must be a .tif/.tiff file")
+    # TIFF tiles must be a multiple of 16; checked here rather than after the mask is done
+    if tile <= 0 or tile % 16:
+        raise ValueError(f"Tile size must be a positive multiple of 16, not {tile}")
+    
+    start_time = time.perf_counter()
+    pixels = open_large_image(in_path)
+    height, width = pixels.shape[:2]
+    
+    if working_size is None:
+        working_size = DEFAULT_WORKING_SIZE if backend == 'ai' else DEFAULT_GRABCUT_WORKING_SIZE
+    proxy, factor = working_copy(pixels, working_size)
+    if backend == 'ai':
+        mask = np.asarray(remove_background_ai(Image.fromarray(proxy), model_name, only_mask=True))
+    else:
+        rect = scaled_grabcut_rect((proxy.shape[1], proxy.shape[0]), (width, height))
+        mask = grabcut_mask(cv2.cvtColor(proxy, cv2.COLOR_RGB2BGR), rect=rect) * np.uint8(255)
+    del proxy
+    
+    total = (-(-height // tile)) * (-(-width // tile))
+    
+    def tiles():
+        done = 0
+        for top in range(0, height, tile):
+            bottom = min(top + tile, height)
+            for left in range(0, width, tile):
+                right = min(left + tile, width)
+                rgba = np.empty((bottom - top, right - left, 4), np.uint8)
+                rgba[:, :, :3] = _rgb_view(pixels, top, bottom, left, right)
+                rgba[:, :, 3] = _upsample_mask_tile(mask, factor, top, bottom, left, right)
+                yield rgba
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+    
+    tifffile.imwrite(out_path, tiles(), shape=(height, width, 4), dtype=np.uint8, tile=(tile, tile),
+                     photometric='rgb', extrasamples=['unassalpha'], compression='zlib', bigtiff=True)
+    del pixels
+    
+    return {
+        'width': width,
+        'height': height,
+        'working_factor': factor,
+        'tiles': total,
+        'seconds': time.perf_counter() - start_time,
+    }
+
+DEFAULT_STREAM_BLOCK_SECONDS = 30
+DEFAULT_STREAM_OVERLAP_SECONDS = 1
+DEFAULT_NOISE_PROFILE_SECONDS = 60
+
+# WAV sample formats that map one-to-one onto a NumPy dtype and can be memory-mapped
+WAV_MEMMAP_SUBTYPES = {'PCM_U8': 'u1', 'PCM_16': '<i2', 'PCM_32': '<i4', 'FLOAT': '<f4', 'DOUBLE': '<f8'}
+# What soundfile decodes everything else to without widening further than needed
+SOUNDFILE_READ_DTYPES = {'PCM_S8': 'int16', 'PCM_U8': 'int16', 'PCM_16': 'int16', 'PCM_24': 'int32',
+                         'PCM_32': 'int32', 'FLOAT': 'float32', 'DOUBLE': 'float64'}
+
+class SoundFileFrames:
+    # Frame-sliceable stand-in for a memmap over formats that cannot be mapped
+    # (FLAC, OGG, 24-bit WAV): only the sliced frames are decoded
+    def __init__(self, path):
+        self.file = sf.SoundFile(path)
+        self.subtype = self.file.subtype
+        self.dtype = np.dtype(SOUNDFILE_READ_DTYPES.get(self.subtype, 'float32'))
+        self.shape = (self.file.frames, self.file.channels)
+    
+    def __len__(self):
+        return self.shape[0]
+    
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(len(self))
+        self.file.seek(start)
+        return self.file.read(max(stop - start, 0), dtype=self.dtype.name, always_2d=True)
+    
+    def close(self):
+        self.file.close()
+
+class SoundFileSink:
+    # Front-to-back writer with the memmap's slice-assignment interface
+    def __init__(self, path, sr, channels, subtype):
+        self.file = sf.SoundFile(path, 'w', sr, channels, subtype=subtype)
+        # libsndfile converts float to the file's sample format itself
+        self.dtype = np.dtype('float32')
+        self.position = 0
+    
+    def __setitem__(self, index, block):
+        if index.start != self.position:
+            raise ValueError("This output format can only be written front to back")
+        self.file.write(block)
+        self.position += len(block)
+    
+    def close(self):
+        self.file.close()
+
+def open_audio_frames(path, writable=False):
+    # Returns (frames x channels array-like, sample rate, subtype). Uncompressed WAV is
+    # memory-mapped in its stored dtype, so nothing is decoded or copied up front;
+    # anything else is read on demand through soundfile
+    if path.lower().endswith('.wav'):
+        subtype = sf.info(path).subtype
+        if subtype in WAV_MEMMAP_SUBTYPES:
+            # scipy finds the data chunk (RIFF and RF64); remap it ourselves for r+ access
+            with warnings.catch_warnings():
+                # fact/LIST chunks are harmless
+                warnings.simplefilter('ignore', scipy_wavfile.WavFileWarning)
+                sr, mapped = scipy_wavfile.read(path, mmap=True)
+            frames = mapped.shape[0]
+            channels = 1 if mapped.ndim == 1 else mapped.shape[1]
+            if frames == 0:
+                return np.zeros((0, channels), mapped.dtype), sr, subtype
+            data = np.memmap(path, dtype=mapped.dtype, mode='r+' if writable else 'r',
+                             offset=mapped.offset, shape=(frames, channels))
+            del mapped
+            return data, sr, subtype
+    if writable:
+        raise ValueError("Only uncompressed 8/16/32-bit or float WAV can be processed in place")
+    frames = SoundFileFrames(path)
+    return frames, frames.file.samplerate, frames.subtype
+
+def create_wav_memmap(path, frames, channels, sr, dtype):
+    # Write a WAV header (RF64 once the data passes 4 GB) and map the data chunk,
+    # pre-sized, for the caller to fill window by window
+    dtype = np.dtype(dtype).newbyteorder('<')
+    width = dtype.itemsize
+    data_bytes = frames * channels * width
+    pad = data_bytes & 1
+    fmt = struct.pack('<HHIIHH', 3 if dtype.kind == 'f' else 1, channels, sr,
+                      sr * channels * width, channels * width, 8 * width)
+    rf64 = data_bytes + 60 > 0xFFFFFFFF
+    with open(path, 'wb') as f:
+        if rf64:
+            riff_size = 4 + (8 + 28) + (8 + len(fmt)) + 8 + data_bytes + pad
+            f.write(b'RF64' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE')
+            f.write(b'ds64' + struct.pack('<IQQQI', 28, riff_size, data_bytes, frames, 0))
+        else:
+            f.write(b'RIFF' + struct.pack('<I', 4 + (8 + len(fmt)) + 8 + data_bytes + pad) + b'WAVE')
+        f.write(b'fmt ' + struct.pack('<I', len(fmt)) + fmt)
+        f.write(b'data' + struct.pack('<I', 0xFFFFFFFF if rf64 else data_bytes))
+        offset = f.tell()
+        f.truncate(offset + data_bytes + pad)
+    if frames == 0:
+        return np.zeros((0, channels), dtype)
+    return np.memmap(path, dtype=dtype, mode='r+', offset=offset, shape=(frames, channels))
+
+def create_audio_output(path, frames, channels, sr, subtype):
+    # Same sample format as the source wherever the container allows it
+    subtype = _output_subtype(path, subtype)
+    if path.lower().endswith('.wav') and subtype in WAV_MEMMAP_SUBTYPES:
+        return create_wav_memmap(path, frames, channels, sr, WAV_MEMMAP_SUBTYPES[subtype])
+    return SoundFileSink(path, sr, channels, subtype)
+
+def close_audio(data):
+    if isinstance(data, np.memmap):
+        data.flush()
+    elif hasattr(data, 'close'):
+        data.close()
+
+def _to_float32(block):
+    if block.dtype.kind == 'f':
+        return block.astype(np.float32)
+    if block.dtype == np.uint8:
+        return (block.astype(np.float32) - 128.0) / 128.0
+    return block.astype(np.float32) / float(2 ** (8 * block.dtype.itemsize - 1))
+
+def _from_float32(block, dtype):
+    if dtype.kind == 'f':
+        return block.astype(dtype)
+    if dtype == np.uint8:
+        return (np.clip(np.round(block * 128.0), -128, 127) + 128).astype(dtype)
+    scale = float(2 ** (8 * dtype.itemsize - 1))
+    return np.clip(np.round(block.astype(np.float64) * scale), -scale, scale - 1).astype(dtype)
+
+def process_audio_windows(src, dst, sr, func, block_seconds=DEFAULT_STREAM_BLOCK_SECONDS,
+                          context_seconds=DEFAULT_STREAM_OVERLAP_SECONDS, progress=None):
+    # func maps a (channels, frames) float32 window to one of the same shape. Each
+    # window is processed with context_seconds of real audio on both sides and only
+    # its middle is kept, so blocks join without seams. dst may be src (in place):
+    # the context before each window is copied out before that stretch is overwritten.
+    frames = len(src)
+    block = max(1, int(block_seconds * sr))
+    context = int(context_seconds * sr)
+    before = src[0:0]
+    for start in range(0, frames, block):
+        end = min(start + block, frames)
+        window = np.concatenate([before, src[start:min(end + context, frames)]])
+        out = func(_to_float32(window).T).T
+        before_len = len(before)
+        before = np.array(src[max(end - context, 0):end])
+        dst[start:end] = _from_float32(out[before_len:before_len + end - start], dst.dtype)
+        if progress is not None:
+            progress(end, frames)
+    return frames
+
+def estimate_noise_clip(y, sr, clip_seconds=2.0, frame_seconds=0.05):
+    # Pick the quietest contiguous stretch of the signal as the noise sample.
+    # y is (frames,) or (channels, frames)
+    mono = y if y.ndim == 1 else y.mean(axis=0)
+    frame = max(1, int(sr * frame_seconds))
+    n_frames = len(mono) // frame
+    window = max(1, int(clip_seconds / frame_seconds))
+    if n_frames <= window:
+        return mono
+    energy = np.square(mono[:n_frames * frame]).reshape(n_frames, frame).mean(axis=1)
+    window_energy = np.convolve(energy, np.ones(window), mode='valid')
+    start = int(np.argmin(window_energy)) * frame
+    return mono[start:start + window * frame]
+
+def _output_subtype(out_path, subtype):
+    # Keep the source encoding when the output container supports it
+    extension = os.path.splitext(out_path)[1][1:].upper()
+    if extension and subtype and sf.check_format(extension, subtype):
+        return subtype
+    return None
+
+def denoise_audio_file_streaming(in_path, out_path, noise_clip=None,
+                                 block_seconds=DEFAULT_STREAM_BLOCK_SECONDS,
+                                 overlap_seconds=DEFAULT_STREAM_OVERLAP_SECONDS,
+                                 profile_seconds=DEFAULT_NOISE_PROFILE_SECONDS, progress=None, profile=None):
+    # Window by window from disk to disk in the source's sample format: WAV input is
+    # memory-mapped and WAV output is a pre-sized memmap. out_path=None overwrites the
+    # input in place; an explicit output that is the input is refused. With a saved
+    # `profile` (see NoiseProfileLibrary) windows go through the STFT-mask gate and no
+    # noise clip is needed
+    in_place = out_path is None
+    if not in_place and os.path.exists(out_path) and os.path.samefile(out_path, in_path):
+        raise ValueError(f"Output {out_path!r} is the input file; pass out_path=None to denoise in place")
+    start_time = time.perf_counter()
+    src, sr, subtype = open_audio_frames(in_path, writable=in_place)
+    try:
+        frames, channels = src.shape
+        
+        # One fixed noise profile for the whole file, taken from its opening minute
+        if noise_clip is None and profile is None:
+            noise_clip = estimate_noise_clip(_to_float32(src[:int(profile_seconds * sr)]).T, sr)
+        
+        if profile is not None:
+            denoise = lambda window: apply_noise_profile(window, sr, profile)
+        else:
+            denoise = lambda window: nr.reduce_noise(y=window, sr=sr, y_noise=noise_clip, stationary=True)
+        
+        dst = src if in_place else create_audio_output(out_path, frames, channels, sr, subtype)
+        try:
+            done = process_audio_windows(src, dst, sr, denoise, block_seconds, overlap_seconds, progress)
+        finally:
+            if dst is not src:
+                close_audio(dst)
+    finally:
+        close_audio(src)
+    
+    elapsed = time.perf_counter() - start_time
+    return {
+        'seconds_of_audio': done / sr,
+        'seconds': elapsed,
+        'realtime_factor': (done / sr) / elapsed if elapsed > 0 else 0.0,
+    }
+
+def copy_audio_file(in_path, out_path, block_seconds=DEFAULT_STREAM_BLOCK_SECONDS):
+    # Convert/copy window by window, e.g. a processed temporary WAV to the user's FLAC
+    src, sr, subtype = open_audio_frames(in_path)
+    try:
+        frames, channels = src.shape
+        dst = create_audio_output(out_path, frames, channels, sr, subtype)
+        try:
+            block = max(1, int(block_seconds * sr))
+            for start in range(0, frames, block):
+                dst[start:start + block] = src[start:start + block]
+        finally:
+            close_audio(dst)
+    finally:
+        close_audio(src)
+
+DEFAULT_SEGMENT_OVERLAP_SECONDS = 2.0
+MIN_SEGMENT_SECONDS = 10
+# noisereduce's default STFT hop; segments start on it so their frames line up with a single pass
+NR_HOP_LENGTH = 256
+
+# Long-lived pool for CPU-bound audio work, started on first use
+_worker_pool = None
+_worker_pool_size = 0
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool(workers=None):
+    global _worker_pool, _worker_pool_size
+    workers = workers or os.cpu_count() or 1
+    with _worker_pool_lock:
+        if _worker_pool is None or _worker_pool_size != workers:
+            if _worker_pool is not None:
+                _worker_pool.shutdown(wait=False)
+            _worker_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context('spawn'))
+            _worker_pool_size = workers
+        return _worker_pool
+
+def _denoise_segment(job):
+    segment, sr, stationary, noise_clip = job
+    return nr.reduce_noise(y=segment, sr=sr, stationary=stationary, y_noise=noise_clip)
+
+def _segment_bounds(n_samples, segment):
+    bounds = list(range(0, n_samples, segment)) + [n_samples]
+    # Fold a short trailing piece into the previous segment
+    if len(bounds) > 2 and bounds[-1] - bounds[-2] < segment // 2:
+        del bounds[-2]
+    return bounds
+
+def denoise_audio_parallel(y, sr, workers=None, stationary=True, noise_clip=None,
+                           segment_seconds=None, overlap_seconds=DEFAULT_SEGMENT_OVERLAP_SECONDS,
+                           progress=None):
+    # y is (frames,) or (channels, frames), as returned by librosa.load(mono=False).
+    # Stationary segments share one noise clip and match a single pass closely;
+    # non-stationary noisereduce has no shared estimate (it ignores y_noise), so
+    # there each segment tracks its own noise floor and the result is only approximate
+    workers = workers or os.cpu_count() or 1
+    channels = y[np.newaxis, :] if y.ndim == 1 else y
+    n_channels, n_samples = channels.shape
+    
+    # Every segment is gated against the same noise statistics
+    if stationary and noise_clip is None:
+        noise_clip = estimate_noise_clip(channels, sr)
+    
+    # Aim for about two segments per worker across all channels, so stragglers even out
+    if segment_seconds is None:
+        per_channel = max(1, -(-2 * workers // n_channels))
+        segment = max(int(MIN_SEGMENT_SECONDS * sr), -(-n_samples // per_channel))
+    else:
+        segment = max(1, int(segment_seconds * sr))
+    segment = max(NR_HOP_LENGTH, segment // NR_HOP_LENGTH * NR_HOP_LENGTH)
+    overlap = min(int(overlap_seconds * sr), segment // 2) // NR_HOP_LENGTH * NR_HOP_LENGTH
+    bounds = _segment_bounds(n_samples, segment)
+    
+    if workers == 1 or (len(bounds) == 2 and n_channels == 1):
+        # Unchunked, like the segments; noisereduce would otherwise split long input itself
+        out = nr.reduce_noise(y=y, sr=sr, stationary=stationary, y_noise=noise_clip, chunk_size=n_samples + 1)
+        if progress is not None:
+            progress(1, 1)
+        return out
+    
+    # Each segment carries `overlap` extra samples on both sides; neighbours are
+    # blended with complementary linear ramps across [bound - overlap, bound + overlap]
+    jobs = []
+    placements = []
+    for ch in range(n_channels):
+        for i in range(len(bounds) - 1):
+            start = max(bounds[i] - overlap, 0)
+            end = min(bounds[i + 1] + overlap, n_samples)
+            jobs.append((channels[ch, start:end], sr, stationary, noise_clip))
+            placements.append((ch, start, end, i > 0, i < len(bounds) - 2))
+    
+    out = np.zeros(channels.shape, np.float32)
+    ramp = (np.arange(2 * overlap, dtype=np.float32) + 0.5) / max(2 * overlap, 1)
+    pool = get_worker_pool(workers)
+    results = pool.map(_denoise_segment, jobs)
+    for done, ((ch, start, end, fade_in, fade_out), denoised) in enumerate(zip(placements, results), 1):
+        weights = np.ones(end - start, np.float32)
+        if fade_in:
+            weights[:2 * overlap] = ramp
+        if fade_out:
+            weights[-2 * overlap:] = ramp[::-1]
+        out[ch, start:end] += denoised * weights
+        if progress is not None:
+            progress(done, len(jobs))
+    
+    return out[0] if y.ndim == 1 else out
+
+# Stationary spectral gating with the same defaults as noisereduce
+NOISE_PROFILE_N_FFT = 1024
+NOISE_PROFILE_HOP = 256
+DEFAULT_N_STD_THRESH = 1.5
+DEFAULT_FREQ_SMOOTH_HZ = 500
+DEFAULT_TIME_SMOOTH_MS = 50
+DEFAULT_GATE_BLOCK_SECONDS = 30
+DEFAULT_PROFILE_DIR = os.environ.get('AI_REMOVER_PROFILE_DIR',
+                                     os.path.join(os.path.expanduser('~'), '.local', 'share',
+                                                  'ai-background-remover', 'noise-profiles'))
+
+def _stft(x, n_fft, hop):
+    return scipy_signal.stft(x, nfft=n_fft, nperseg=n_fft, noverlap=n_fft - hop, padded=False)[2]
+
+def _spectrum_db(spec, top_db=80.0):
+    db = 20 * np.log10(np.abs(spec) + np.finfo(np.float32).eps)
+    return np.maximum(db, db.max(axis=-1, keepdims=True) - top_db)
+
+def compute_noise_profile(noise_clip, sr, n_fft=NOISE_PROFILE_N_FFT, hop=NOISE_PROFILE_HOP):
+    # Per-frequency mean and spread (dB) of a noise-only clip; everything the
+    # stationary gate needs, so it never has to look at the noise again
+    mono = noise_clip if noise_clip.ndim == 1 else noise_clip.mean(axis=0)
+    db = _spectrum_db(_stft(mono.astype(np.float32), n_fft, hop))
+    return {
+        'sr': int(sr),
+        'n_fft': n_fft,
+        'hop': hop,
+        'mean_db': db.mean(axis=1).astype(np.float32),
+        'std_db': db.std(axis=1).astype(np.float32),
+        'seconds': len(mono) / sr,
+    }
+
+def _triangle(n):
+    # noisereduce softens the gate with the outer product of two of these, so the
+    # 2-D smoothing splits into one cheap 1-D pass per axis
+    ramp = np.concatenate([np.linspace(0, 1, n + 1, endpoint=False), np.linspace(1, 0, n + 2)])[1:-1]
+    return (ramp / ramp.sum()).astype(np.float32)
+
+def apply_noise_profile(y, sr, profile, prop_decrease=1.0, n_std_thresh=DEFAULT_N_STD_THRESH,
+                        freq_smooth_hz=DEFAULT_FREQ_SMOOTH_HZ, time_smooth_ms=DEFAULT_TIME_SMOOTH_MS,
+                        block_seconds=DEFAULT_GATE_BLOCK_SECONDS, progress=None):
+    # Stationary spectral gate against a precomputed profile: one STFT per block
+    # for all channels, threshold, smooth the mask, inverse STFT. Blocks carry
+    # a second of context on each side so the seams are not audible.
+    # y is (frames,) or (channels, frames)
+    if sr != profile['sr']:
+        raise ValueError(f"Noise profile was made at {profile['sr']} Hz, audio is {sr} Hz")
+    n_fft, hop = profile['n_fft'], profile['hop']
+    threshold = (profile['mean_db'] + n_std_thresh * profile['std_db'])[:, np.newaxis]
+    freq_kernel = _triangle(max(1, int(freq_smooth_hz / (sr / (n_fft / 2)))))
+    time_kernel = _triangle(max(1, int(time_smooth_ms / (hop / sr * 1000))))
+    
+    channels = np.atleast_2d(y).astype(np.float32, copy=False)
+    n_samples = channels.shape[1]
+    block = max(n_fft, int(block_seconds * sr))
+    context = int(sr)
+    out = np.empty(channels.shape, np.float32)
+    for start in range(0, n_samples, block):
+        end = min(start + block, n_samples)
+        lo, hi = max(start - context, 0), min(end + context, n_samples)
+        spec = _stft(channels[:, lo:hi], n_fft, hop)
+        mask = (_spectrum_db(spec) > threshold).astype(np.float32)
+        if prop_decrease != 1.0:
+            mask = mask * prop_decrease + (1.0 - prop_decrease)
+        mask = scipy_ndimage.convolve1d(mask, freq_kernel, axis=1, mode='constant')
+        mask = scipy_ndimage.convolve1d(mask, time_kernel, axis=2, mode='constant')
+        gated = scipy_signal.istft(spec * mask, nfft=n_fft, nperseg=n_fft, noverlap=n_fft - hop)[1]
+        piece = np.zeros((channels.shape[0], hi - lo), np.float32)
+        piece[:, :min(gated.shape[1], hi - lo)] = gated[:, :hi - lo]
+        out[:, start:end] = piece[:, start - lo:end - lo]
+        if progress is not None:
+            progress(-(-end // block), -(-n_samples // block))
+    
+    return out[0] if y.ndim == 1 else out
+
+class NoiseProfileLibrary:
+    # Named noise profiles on disk: one .npz per profile plus an index.json with
+    # what each was made from, so a studio's room tone is measured once and reused
+    def __init__(self, directory=DEFAULT_PROFILE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_index(self, index):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+    
+    def _path(self, name):
+        return os.path.join(self.directory, hashlib.sha1(name.encode()).hexdigest()[:16] + '.npz')
+    
+    def save(self, name, profile, source=None):
+        path = self._path(name)
+        with self.lock:
+            np.savez(path, mean_db=profile['mean_db'], std_db=profile['std_db'])
+            index = self._read_index()
+            index[name] = {
+                'file': os.path.basename(path),
+                'sr': profile['sr'],
+                'n_fft': profile['n_fft'],
+                'hop': profile['hop'],
+                'seconds': profile['seconds'],
+                'source': source,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self._write_index(index)
+    
+    def load(self, name):
+        with self.lock:
+            entry = self._read_index().get(name)
+        if entry is None:
+            raise KeyError(f"No noise profile named {name!r}")
+        with np.load(os.path.join(self.directory, entry['file'])) as data:
+            profile = {'mean_db': data['mean_db'], 'std_db': data['std_db']}
+        profile.update({key: entry[key] for key in ('sr', 'n_fft', 'hop', 'seconds')})
+        return profile
+    
+    def delete(self, name):
+        with self.lock:
+            index = self._read_index()
+            entry = index.pop(name, None)
+            if entry is None:
+                return False
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
+            self._write_index(index)
+            return True
+    
+    def entries(self):
+        with self.lock:
+            return self._read_index()
+
+_profile_library = None
+
+def get_profile_library():
+    global _profile_library
+    if _profile_library is None:
+        _profile_library = NoiseProfileLibrary()
+    return _profile_library
+
+def create_noise_profile(name, clip_path, clip_seconds=None):
+    # Profile from a noise-only recording; with clip_seconds, from its quietest stretch
+    y, sr = sf.read(clip_path, dtype='float32', always_2d=True)
+    y = y.T
+    if clip_seconds:
+        y = estimate_noise_clip(y, sr, clip_seconds)
+    profile = compute_noise_profile(y, sr)
+    get_profile_library().save(name, profile, source=os.path.abspath(clip_path))
+    return profile
+
+def _denoise_with_profile_one(in_path, out_path, profile):
+    if not os.path.isfile(in_path):
+        raise FileNotFoundError(f"No such file: {in_path!r}")
+    return denoise_audio_file_streaming(in_path, out_path, profile=profile)['seconds_of_audio']
+
+def denoise_batch_with_profile(inputs, output_dir, profile, workers=None, progress=None):
+    # Same profile for every file: no per-file noise estimation at all.
+    # The FFTs release the GIL, so a thread pool scales across cores.
+    # Anything that is not a directory is kept, so a missing file fails as its own item
+    paths = [path for path in inputs if not os.path.isdir(path)]
+    for directory in (path for path in inputs if os.path.isdir(path)):
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.join(directory, name))
+    outputs = _batch_output_paths(paths, output_dir, extension=None)
+    _check_outputs_not_inputs(paths, outputs)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    audio_seconds = 0.0
+    failed = 0
+    done = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(_denoise_with_profile_one, path, out_path, profile): path
+                   for path, out_path in zip(paths, outputs)}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is None:
+                audio_seconds += future.result()
+            else:
+                failed += 1
+            done += 1
+            if progress is not None:
+                progress(done, len(paths), futures[future], error)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'files': len(paths),
+        'failed': failed,
+        'seconds_of_audio': audio_seconds,
+        'seconds': elapsed,
+        'audio_seconds_per_sec': audio_seconds / elapsed if elapsed > 0 else 0.0,
+    }
+
+DEFAULT_CACHE_DIR = os.environ.get('AI_REMOVER_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'ai-background-remover'))
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+class ResultCache:
+    # Disk-backed results keyed by a hash of the input, back end and parameters.
+    # Entries are .npy files; a file's mtime is its last use, oldest go first once
+    # the directory grows past max_bytes.
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats_path = os.path.join(directory, 'stats.json')
+        os.makedirs(directory, exist_ok=True)
+        
+        self.entries = {}
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.npy'):
+                info = entry.stat()
+                self.entries[entry.name[:-4]] = (info.st_size, info.st_mtime)
+        self.total_bytes = sum(size for size, _ in self.entries.values())
+    
+    @staticmethod
+    def make_key(payload, backend, params):
+        digest = hashlib.sha256()
+        for chunk in payload:
+            digest.update(chunk)
+        digest.update(backend.encode())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+    
+    def _bump(self, counter, amount=1):
+        # Counters live on disk so other processes (and the CLI) see the same numbers
+        try:
+            with open(self.stats_path) as f:
+                counters = json.load(f)
+        except (OSError, ValueError):
+            counters = {}
+        counters[counter] = counters.get(counter, 0) + amount
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(counters, f)
+        os.replace(tmp_path, self.stats_path)
+    
+    def get(self, key):
+        with self.lock:
+            path = self._path(key)
+            try:
+                result = np.load(path, allow_pickle=False)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.entries.pop(key, None)
+                self._bump('misses')
+                return None
+            size = os.path.getsize(path)
+            if key not in self.entries:
+                self.total_bytes += size
+            self.entries[key] = (size, time.time())
+            self._bump('hits')
+            return result
+    
+    def put(self, key, array):
+        with self.lock:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp_path, path)
+            
+            old_size, _ = self.entries.get(key, (0, 0))
+            size = os.path.getsize(path)
+            self.entries[key] = (size, time.time())
+            self.total_bytes += size - old_size
+            self._evict()
+    
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        for key, (size, _) in sorted(self.entries.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self.entries[key]
+            self.total_bytes -= size
+            evicted += 1
+        self._bump('evictions', evicted)
+    
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self.entries.clear()
+            self.total_bytes = 0
+            try:
+                os.remove(self.stats_path)
+            except OSError:
+                pass
+    
+    def stats(self):
+        try:
+            with open(self.stats_path) as f:
+                counters = json.load(f)
+        except (OSError, ValueError):
+            counters = {}
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+_result_cache = None
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
+
+def image_cache_key(image, backend, params=None):
+    payload = (image.mode.encode(), repr(image.size).encode(), image.tobytes())
+    return ResultCache.make_key(payload, backend, params or {})
+
+def audio_cache_key(y, sr, backend, params=None):
+    y = np.ascontiguousarray(y)
+    payload = (str(sr).encode(), repr(y.shape).encode(), y.dtype.str.encode(), y)
+    return ResultCache.make_key(payload, backend, params or {})
+
+def remove_background_cached(image, backend='ai', model_name=DEFAULT_REMBG_MODEL, multires=False, rect=None):
+    # The image tab's removal: rembg or GrabCut behind the result cache. `rect` is
+    # GrabCut's starting rectangle, for copies resized from a larger original
+    if backend == 'ai':
+        cache_key = image_cache_key(image, 'rembg', {'model': model_name})
+    elif rect is None:
+        cache_key = image_cache_key(image, 'grabcut', {'multires': multires})
+    else:
+        cache_key = image_cache_key(image, 'grabcut', {'multires': multires, 'rect': list(rect)})
+    cache = get_result_cache()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Image.fromarray(cached)
+    
+    if backend == 'ai':
+        result = remove_background_ai(image, model_name)
+    else:
+        result = grabcut_remove_background(image, multires=multires, rect=rect)
+    cache.put(cache_key, np.asarray(result))
+    return result
+
+def denoise_audio_cached(y, sr, progress=None, profile=None, parallel=False):
+    # The audio tab's denoise behind the result cache: single-pass noisereduce, the
+    # segment-parallel stationary mode when parallel=True, or the STFT-mask gate when
+    # a saved noise profile is given
+    cache = get_result_cache()
+    if profile is not None:
+        digest = hashlib.sha1(profile['mean_db'].tobytes() + profile['std_db'].tobytes()).hexdigest()
+        cache_key = audio_cache_key(y, sr, 'profile-gate', {'profile': digest})
+    elif parallel:
+        cache_key = audio_cache_key(y, sr, 'noisereduce-parallel', {'stationary': True})
+    else:
+        cache_key = audio_cache_key(y, sr, 'noisereduce', {'stationary': False})
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    if profile is not None:
+        result = apply_noise_profile(y, sr, profile, progress=progress)
+    elif parallel:
+        result = denoise_audio_parallel(y, sr, progress=progress)
+    else:
+        result = nr.reduce_noise(y=y, sr=sr)
+    cache.put(cache_key, result)
+    return result
+
+MANIFEST_OPS = ('ai', 'grabcut', 'replace', 'denoise')
+MANIFEST_BACKENDS = ('ai', 'grabcut')
+# Items handed to the pool ahead of time, per worker; the rest of the manifest waits
+MANIFEST_QUEUE_PER_WORKER = 2
+
+def _manifest_flag(value):
+    return value is True or str(value).lower() in ('1', 'true', 'yes')
+
+def _manifest_item(raw, line, base_dir):
+    # CSV leaves empty cells as '', JSON may have nulls; both mean "not set"
+    item = {key: value for key, value in raw.items() if value not in (None, '')}
+    op = item.get('op')
+    if op not in MANIFEST_OPS:
+        raise ValueError(f"Manifest line {line}: unknown op {op!r} (expected one of {', '.join(MANIFEST_OPS)})")
+    for key in ('input', 'output') + (('background',) if op == 'replace' else ()):
+        if key not in item:
+            raise ValueError(f"Manifest line {line}: {op!r} needs {key!r}")
+    if 'backend' in item and (op != 'replace' or item['backend'] not in MANIFEST_BACKENDS):
+        raise ValueError(f"Manifest line {line}: backend {item['backend']!r} is only allowed on 'replace' "
+                         f"items, as one of {', '.join(MANIFEST_BACKENDS)}")
+    
+    # The id is the output as written in the manifest, so it survives moving the whole tree
+    item.setdefault('id', item['output'])
+    for key in ('input', 'output', 'background'):
+        if key in item:
+            item[key] = os.path.join(base_dir, os.path.expanduser(item[key]))
+    if os.path.abspath(item['input']) == os.path.abspath(item['output']):
+        raise ValueError(f"Manifest line {line}: output must differ from input")
+    return item
+
+def load_manifest(path):
+    # JSON lines, one {"op": ..., "input": ..., "output": ...} object per line, or a CSV
+    # file with the same column names. Optional keys: id, background (replace), backend
+    # (replace: cut out first with 'ai' or 'grabcut'), model, multires, profile (denoise).
+    # Relative paths are taken from the manifest's directory
+    base_dir = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            rows = enumerate(csv.DictReader(f), start=2)
+        else:
+            rows = ((line, text) for line, text in enumerate(f, start=1)
+                    if text.strip() and not text.lstrip().startswith('#'))
+        for line, row in rows:
+            if isinstance(row, str):
+                try:
+                    row = json.loads(row)
+                except ValueError as e:
+                    raise ValueError(f"Manifest line {line}: {e}")
+            items.append(_manifest_item(row, line, base_dir))
+    
+    seen = set()
+    for item in items:
+        if item['id'] in seen:
+            raise ValueError(f"Manifest lists {item['id']!r} more than once")
+        seen.add(item['id'])
+    return items
+
+def load_checkpoint(path):
+    # Last record per item wins; a line torn by a crash is ignored
+    records = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for text in f:
+                try:
+                    record = json.loads(text)
+                except ValueError:
+                    continue
+                records[record['id']] = record
+    return records
+
+def _open_checkpoint(path):
+    # Append-only; finish a torn last line so the next record starts on its own
+    torn = False
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b'\n'
+    log = open(path, 'a', encoding='utf-8')
+    if torn:
+        log.write('\n')
+    return log
+
+def _manifest_needs_run(item, record, retry_failed):
+    if record is None:
+        return True
+    if record['status'] == 'done':
+        return not os.path.exists(item['output'])
+    return retry_failed
+
+def _check_manifest_requirements(items):
+    needed = {item['op'] for item in items} | {item['backend'] for item in items if 'backend' in item}
+    if 'ai' in needed and not REMBG_AVAILABLE:
+        raise RuntimeError("rembg not installed! Run: pip install rembg")
+    if 'grabcut' in needed and not CV2_AVAILABLE:
+        raise RuntimeError("OpenCV not installed! Run: pip install opencv-python")
+    if 'denoise' in needed and not AUDIO_AVAILABLE:
+        raise RuntimeError("Audio libraries not installed!")
+
+def _run_manifest_item(item, profiles, sessions):
+    # Written under a temporary name next to the output and renamed into place, so an
+    # interrupted run never leaves a truncated file that looks finished
+    root, extension = os.path.splitext(item['output'])
+    partial = f"{root}.partial{extension}"
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(item['output']), exist_ok=True)
+        op = item['op']
+        if op == 'denoise':
+            denoise_audio_file_streaming(item['input'], partial, profile=profiles.get(item.get('profile')))
+        else:
+            image = Image.open(item['input'])
+            backend = op if op != 'replace' else item.get('backend')
+            if backend == 'ai':
+                image = rembg.remove(image, session=sessions[item.get('model', DEFAULT_REMBG_MODEL)])
+            elif backend == 'grabcut':
+                image = grabcut_remove_background(image, multires=_manifest_flag(item.get('multires')))
+            if op == 'replace':
+                image = composite_image(image, item['background'])
+            save_image_file(image, partial)
+        os.replace(partial, item['output'])
+        return time.perf_counter() - start, None
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        return time.perf_counter() - start, str(e)
+
+def summarize_manifest(items, records):
+    # Per-item status and timing, plus per-op totals and percentiles over finished items
+    timings = []
+    ops = {}
+    for item in items:
+        record = records.get(item['id'])
+        status = record['status'] if record is not None else 'pending'
+        entry = {'id': item['id'], 'op': item['op'], 'status': status,
+                 'seconds': record['seconds'] if record is not None else None}
+        if record is not None and 'error' in record:
+            entry['error'] = record['error']
+        timings.append(entry)
+        
+        stats = ops.setdefault(item['op'], {'done': 0, 'failed': 0, 'pending': 0, 'seconds': []})
+        stats[status] += 1
+        if status == 'done':
+            stats['seconds'].append(record['seconds'])
+    
+    for stats in ops.values():
+        seconds = stats.pop('seconds')
+        stats['total_seconds'] = float(sum(seconds))
+        for name, q in (('p50_seconds', 50), ('p95_seconds', 95), ('max_seconds', 100)):
+            stats[name] = float(np.percentile(seconds, q)) if seconds else None
+    
+    return {
+        'items': len(items),
+        'done': sum(stats['done'] for stats in ops.values()),
+        'failed': sum(stats['failed'] for stats in ops.values()),
+        'pending': sum(stats['pending'] for stats in ops.values()),
+        'ops': ops,
+        'timings': timings,
+    }
+
+def run_manifest(manifest_path, workers=None, checkpoint_path=None, summary_path=None,
+                 retry_failed=False, progress=None):
+    # Every finished item is appended to the checkpoint as soon as it is written, so a
+    # killed run restarts where it stopped: finished items are skipped (unless their
+    # output has gone missing) and so are failed ones unless retry_failed. Only a few
+    # items per worker are queued at a time, so a 100k-item manifest stays cheap.
+    # progress(done, total, item, error) may raise to stop early; items already
+    # running finish and are recorded first
+    items = load_manifest(manifest_path)
+    checkpoint_path = checkpoint_path or manifest_path + '.checkpoint.jsonl'
+    summary_path = summary_path or manifest_path + '.summary.json'
+    records = load_checkpoint(checkpoint_path)
+    pending = [item for item in items if _manifest_needs_run(item, records.get(item['id']), retry_failed)]
+    _check_manifest_requirements(pending)
+    
+    # Profiles are looked up once, so a misspelt name fails before any work starts
+    library = get_profile_library()
+    profiles = {name: library.load(name) for name in {item['profile'] for item in pending if 'profile' in item}}
+    
+    # One session per model for the whole run, loaded before any work starts. Several AI
+    # items run at once, so the session's thread pools get the cores split between workers
+    workers = max(1, workers or os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else None
+    models = {item.get('model', DEFAULT_REMBG_MODEL) for item in pending
+              if item['op'] == 'ai' or item.get('backend') == 'ai'}
+    sessions = {model: get_rembg_session(model, threads) for model in models}
+    
+    processed = failed = 0
+    stopped = None
+    start = time.perf_counter()
+    with _open_checkpoint(checkpoint_path) as log, ThreadPoolExecutor(max_workers=workers) as pool:
+        queued = iter(pending)
+        running = {}
+        
+        def submit_next():
+            item = next(queued, None)
+            if item is not None:
+                running[pool.submit(_run_manifest_item, item, profiles, sessions)] = item
+        
+        for _ in range(workers * MANIFEST_QUEUE_PER_WORKER):
+            submit_next()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item = running.pop(future)
+                seconds, error = future.result()
+                record = {'id': item['id'], 'op': item['op'], 'status': 'done' if error is None else 'failed',
+                          'seconds': round(seconds, 4), 'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                if error is not None:
+                    record['error'] = error
+                    failed += 1
+                log.write(json.dumps(record) + '\n')
+                log.flush()
+                records[item['id']] = record
+                processed += 1
+                
+                if stopped is None:
+                    try:
+                        if progress is not None:
+                            progress(processed, len(pending), item, error)
+                        submit_next()
+                    except Exception as e:
+                        stopped = e
+    elapsed = time.perf_counter() - start
+    
+    summary = summarize_manifest(items, records)
+    summary['run'] = {
+        'processed': processed,
+        'failed': failed,
+        'skipped': len(items) - len(pending),
+        'workers': workers,
+        'seconds': elapsed,
+        'items_per_sec': processed / elapsed if elapsed > 0 else 0.0,
+        'checkpoint': checkpoint_path,
+        'summary': summary_path,
+    }
+    partial = summary_path + '.partial'
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=1)
+    os.replace(partial, summary_path)
+    
+    if stopped is not None:
+        raise stopped
+    return summary
+
+DEFAULT_GUI_WORKERS = 2
+# Above this, the audio tab works on a memory-mapped view of the file instead of decoding it
+IN_MEMORY_AUDIO_BYTES = 256 * 1024 ** 2
+ESTIMATE_PROFILE = "(estimate from audio)"
+UI_POLL_MS = 50
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    # One unit of GUI work. The worker reports progress through job.progress(done, total),
+    # which is also where a cancelled job stops: the next call raises JobCancelled
+    def __init__(self, scheduler, key, label, unit, on_progress=None, outputs=()):
+        self.scheduler = scheduler
+        self.key = key
+        self.label = label
+        self.unit = unit
+        self.on_progress = on_progress
+        self.outputs = outputs
+        self.progress_posted = False
+        self.state = 'queued'
+        self.done = 0
+        self.total = 0
+        self.future = None
+        self.cancel_event = threading.Event()
+    
+    def progress(self, done, total):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        self.done, self.total = done, total
+        self.scheduler.progress_changed(self)
+    
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+    
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            # Never started, so _run won't clean up; outputs may already exist (temp files)
+            self.remove_outputs()
+            self.scheduler.finished(self)
+    
+    def remove_outputs(self):
+        for path in self.outputs:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def describe(self):
+        if self.state == 'queued':
+            return f"{self.label}: queued"
+        if self.total:
+            return f"{self.label}: {self.done}/{self.total} {self.unit}"
+        return f"{self.label}: running"
+
+class JobScheduler:
+    # Runs GUI work on a small bounded pool. Workers never touch Tk: every UI update
+    # goes through one queue that the Tk thread drains every UI_POLL_MS
+    def __init__(self, root, workers=DEFAULT_GUI_WORKERS, on_change=None):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gui-job')
+        self.ui_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.on_change = on_change
+        self.root.after(UI_POLL_MS, self._drain)
+    
+    def call_in_ui(self, func, *args):
+        self.ui_queue.put((func, args))
+    
+    def submit(self, key, label, func, unit='', on_done=None, on_error=None, on_progress=None, outputs=()):
+        # func(job) runs on a worker; on_done(result), on_error(exc) and
+        # on_progress(done, total) run on the Tk thread. Partially written
+        # outputs are removed if the job fails or is cancelled.
+        # Returns None if an identical job is already queued or running.
+        with self.lock:
+            if key in self.jobs:
+                return None
+            job = Job(self, key, label, unit, on_progress, outputs)
+            self.jobs[key] = job
+        job.future = self.executor.submit(self._run, job, func, on_done, on_error)
+        self.call_in_ui(self._notify)
+        return job
+    
+    def _run(self, job, func, on_done, on_error):
+        job.state = 'running'
+        self.call_in_ui(self._notify)
+        try:
+            job.check_cancelled()
+            result = func(job)
+            job.check_cancelled()
+        except Exception as e:
+            job.remove_outputs()
+            if not isinstance(e, JobCancelled) and on_error is not None:
+                self.call_in_ui(on_error, e)
+        else:
+            if on_done is not None:
+                self.call_in_ui(on_done, result)
+        finally:
+            self.finished(job)
+    
+    def finished(self, job):
+        job.state = 'finished'
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+        self.call_in_ui(self._notify)
+    
+    def progress_changed(self, job):
+        # Coalesce: at most one pending progress update per job in the queue
+        if not job.progress_posted:
+            job.progress_posted = True
+            self.call_in_ui(self._deliver_progress, job)
+    
+    def _deliver_progress(self, job):
+        job.progress_posted = False
+        if job.on_progress is not None and not job.cancel_event.is_set():
+            job.on_progress(job.done, job.total)
+        self._notify()
+    
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change(self.active_jobs())
+    
+    def active_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+    
+    def cancel_all(self):
+        for job in self.active_jobs():
+            job.cancel()
+    
+    def _drain(self):
+        try:
+            while True:
+                try:
+                    func, args = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                func(*args)
+        finally:
+            # A failing callback is reported by Tk; the rest are picked up next tick
+            self.root.after(UI_POLL_MS, self._drain)
+    
+    def shutdown(self):
+        # GrabCut and AI jobs never check for cancellation, so running jobs are abandoned:
+        # their partial outputs are removed and the caller exits without joining the pool
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for job in self.active_jobs():
+            try:
+                job.remove_outputs()
+            except OSError:
+                pass
 
 class BackgroundRemoverApp:
     def __init__(self, root):
@@ -38,6 +1888,18 @@ class BackgroundRemoverApp:
         self.current_image = None
         self.current_audio = None
         self.sample_rate = None
+        # Set instead of current_audio/processed_audio for files too big to decode into RAM
+        self.current_audio_path = None
+        self.processed_audio_path = None
+        
+        # Canvas-sized copies of what each canvas shows, and the request a preview belongs to
+        self.display_cache = {}
+        self.pending_render = None
+        # Job the audio bar is animating for while it has no progress to show
+        self.audio_busy_key = None
+        
+        # All background work goes through one bounded scheduler
+        self.scheduler = JobScheduler(root, on_change=self.update_job_status)
         
         self.setup_ui()
     
@@ -73,6 +1935,25 @@ class BackgroundRemoverApp:
                                font=('Arial', 10), fg='yellow', bg='#2c3e50', justify='left')
         status_label.pack(anchor='w')
         
+        # Result cache counters
+        self.cache_label = tk.Label(status_frame, text="", font=('Arial', 10),
+                                    fg='#bdc3c7', bg='#2c3e50', justify='left')
+        self.cache_label.pack(anchor='w')
+        self.update_cache_status()
+        
+        # Running and queued jobs, with a button to cancel them
+        jobs_frame = tk.Frame(status_frame, bg='#2c3e50')
+        jobs_frame.pack(fill='x')
+        self.cancel_btn = tk.Button(jobs_frame, text="Cancel Jobs", command=self.scheduler.cancel_all,
+                                    font=('Arial', 10), bg='#7f8c8d', fg='white', state='disabled')
+        self.cancel_btn.pack(side='right')
+        manifest_btn = tk.Button(jobs_frame, text="Run Manifest...", command=self.run_manifest_file,
+                                 font=('Arial', 10), bg='#7f8c8d', fg='white')
+        manifest_btn.pack(side='right', padx=5)
+        self.job_label = tk.Label(jobs_frame, text="Jobs: idle", font=('Arial', 10),
+                                  fg='#bdc3c7', bg='#2c3e50', justify='left', anchor='w')
+        self.job_label.pack(side='left', fill='x', expand=True)
+        
         # Create notebook for tabs
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill='both', expand=True, padx=20, pady=10)
@@ -82,6 +1963,12 @@ class BackgroundRemoverApp:
         notebook.add(self.image_frame, text="Image Background Removal")
         self.setup_image_tab()
         
+        # Video processing tab
+        if CV2_AVAILABLE:
+            self.video_frame = tk.Frame(notebook, bg='#34495e')
+            notebook.add(self.video_frame, text="Video Background Removal")
+            self.setup_video_tab()
+        
         # Audio processing tab
         if AUDIO_AVAILABLE:
             self.audio_frame = tk.Frame(notebook, bg='#34495e')
@@ -95,6 +1982,85 @@ class BackgroundRemoverApp:
                                  font=('Arial', 14), fg='red', bg='#34495e', justify='center')
             error_label.pack(expand=True)
     
+    def update_cache_status(self):
+        stats = get_result_cache().stats()
+        self.cache_label.config(text=f"Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+                                     f"{stats['entries']} entries ({stats['bytes'] / 1024 ** 2:.0f} MB)")
+    
+    def update_job_status(self, jobs):
+        if jobs:
+            self.job_label.config(text="Jobs: " + "; ".join(job.describe() for job in jobs))
+            self.cancel_btn.config(state='normal')
+        else:
+            self.job_label.config(text="Jobs: idle")
+            self.cancel_btn.config(state='disabled')
+        if self.audio_busy_key is not None and all(job.key != self.audio_busy_key for job in jobs):
+            self.stop_audio_busy()
+    
+    def submit_job(self, key, label, func, on_done, error_message, unit='', on_progress=None, outputs=()):
+        def on_error(e):
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+        
+        job = self.scheduler.submit(key, label, func, unit, on_done, on_error, on_progress, outputs)
+        if job is None:
+            messagebox.showinfo("Busy", f"{label} is already queued or running.")
+        return job
+    
+    def run_manifest_file(self):
+        file_path = filedialog.askopenfilename(
+            title="Select Batch Manifest",
+            filetypes=[("Manifests", "*.jsonl *.json *.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        # Cancelling stops after the running items; running the manifest again resumes it
+        def on_done(summary):
+            run = summary['run']
+            messagebox.showinfo("Manifest Finished",
+                                f"Processed {run['processed']} items ({run['failed']} failed), "
+                                f"skipped {run['skipped']} finished earlier.\n\nSummary: {run['summary']}")
+        
+        self.submit_job(('manifest', os.path.abspath(file_path)), f"Manifest {os.path.basename(file_path)}",
+                        lambda job: run_manifest(file_path, progress=lambda done, total, item, error:
+                                                 job.progress(done, total)),
+                        on_done, "Manifest run failed", unit='items')
+    
+    def show_processed_image(self, image, message, token=None):
+        if token is not None and self.pending_render is token:
+            self.pending_render = None
+        self.processed_image = image
+        self.processed_title.config(text="Processed Image")
+        self.update_cache_status()
+        self.display_image_on_canvas(self.processed_image, self.processed_canvas)
+        messagebox.showinfo("Success", message)
+    
+    def show_preview(self, image, token):
+        # Only while its full-resolution render is still outstanding
+        if self.pending_render is token:
+            self.processed_title.config(text="Processed Image (preview, rendering full size...)")
+            self.display_image_on_canvas(image, self.processed_canvas)
+    
+    def submit_with_preview(self, key, label, segment, message):
+        # segment(image, full_size) -> RGBA cut-out, where full_size is the original's
+        # size. With previews on, it first runs on the canvas-sized copy of the original
+        # so a result shows almost at once; the full-resolution job runs next to it and
+        # replaces the preview when done
+        image = self.current_image
+        token = object()
+        
+        # The preview is queued first so it is not stuck behind the full render
+        if self.preview_first.get():
+            proxy = self.display_copy(image, self.original_canvas)
+            self.scheduler.submit(('preview',) + key, label + " (preview)",
+                                  lambda job: segment(proxy, image.size),
+                                  on_done=lambda result: self.show_preview(result, token))
+        
+        if self.submit_job(key, label, lambda job: segment(image, image.size),
+                           lambda result: self.show_processed_image(result, message, token),
+                           "Failed to remove background"):
+            self.pending_render = token
+    
     def setup_image_tab(self):
         # Image controls frame
         controls_frame = tk.Frame(self.image_frame, bg='#34495e')
@@ -119,6 +2085,29 @@ class BackgroundRemoverApp:
                                  command=self.remove_background_basic, font=('Arial', 12),
                                  bg='#9b59b6', fg='white', padx=20, pady=5)
             basic_btn.pack(side='left', padx=5)
+            
+            # Coarse-to-fine GrabCut for large photos
+            self.grabcut_multires = tk.BooleanVar(value=False)
+            multires_check = tk.Checkbutton(controls_frame, text="Fast (multi-res)",
+                                            variable=self.grabcut_multires, font=('Arial', 10),
+                                            fg='white', bg='#34495e', selectcolor='#2c3e50',
+                                            activebackground='#34495e')
+            multires_check.pack(side='left', padx=5)
+        
+        # Show a canvas-resolution result first, then swap in the full render
+        self.preview_first = tk.BooleanVar(value=True)
+        preview_check = tk.Checkbutton(controls_frame, text="Preview first",
+                                       variable=self.preview_first, font=('Arial', 10),
+                                       fg='white', bg='#34495e', selectcolor='#2c3e50',
+                                       activebackground='#34495e')
+        preview_check.pack(side='left', padx=5)
+        
+        # Tiled, memory-bounded path for very large scans
+        if TIFF_AVAILABLE and (REMBG_AVAILABLE or CV2_AVAILABLE):
+            large_btn = tk.Button(controls_frame, text="Large Image (Tiled)",
+                                  command=self.remove_large_image_background, font=('Arial', 12),
+                                  bg='#16a085', fg='white', padx=20, pady=5)
+            large_btn.pack(side='left', padx=5)
         
         # Replace background button
         replace_btn = tk.Button(controls_frame, text="Replace Background", 
@@ -147,19 +2136,55 @@ class BackgroundRemoverApp:
         tk.Label(left_frame, text="Original Image", font=('Arial', 12), 
                 fg='white', bg='#34495e').pack(pady=5)
         
-        self.original_canvas = tk.Canvas(left_frame, bg='#2c3e50', width=400, height=300)
+        self.original_canvas = tk.Canvas(left_frame, bg='#2c3e50', width=DEFAULT_CANVAS_SIZE[0],
+                                         height=DEFAULT_CANVAS_SIZE[1])
         self.original_canvas.pack(pady=5)
         
         # Processed image side
         right_frame = tk.Frame(canvas_frame, bg='#34495e')
         right_frame.pack(side='right', fill='both', expand=True, padx=10)
         
-        tk.Label(right_frame, text="Processed Image", font=('Arial', 12), 
-                fg='white', bg='#34495e').pack(pady=5)
+        self.processed_title = tk.Label(right_frame, text="Processed Image", font=('Arial', 12),
+                                        fg='white', bg='#34495e')
+        self.processed_title.pack(pady=5)
         
-        self.processed_canvas = tk.Canvas(right_frame, bg='#2c3e50', width=400, height=300)
+        self.processed_canvas = tk.Canvas(right_frame, bg='#2c3e50', width=DEFAULT_CANVAS_SIZE[0],
+                                          height=DEFAULT_CANVAS_SIZE[1])
         self.processed_canvas.pack(pady=5)
     
+    def setup_video_tab(self):
+        # Video controls frame
+        video_controls = tk.Frame(self.video_frame, bg='#34495e')
+        video_controls.pack(fill='x', padx=20, pady=10)
+        
+        process_video_btn = tk.Button(video_controls, text="Remove Video Background",
+                                      command=self.remove_video_background, font=('Arial', 12),
+                                      bg='#e74c3c', fg='white', padx=20, pady=5)
+        process_video_btn.pack(side='left', padx=5)
+        
+        # Segmentation back end, same choices as the image tab
+        self.video_backend = tk.StringVar(value='ai' if REMBG_AVAILABLE else 'grabcut')
+        if REMBG_AVAILABLE:
+            tk.Radiobutton(video_controls, text="AI", variable=self.video_backend, value='ai',
+                           font=('Arial', 10), fg='white', bg='#34495e', selectcolor='#2c3e50',
+                           activebackground='#34495e').pack(side='left', padx=5)
+        tk.Radiobutton(video_controls, text="Basic (GrabCut)", variable=self.video_backend, value='grabcut',
+                       font=('Arial', 10), fg='white', bg='#34495e', selectcolor='#2c3e50',
+                       activebackground='#34495e').pack(side='left', padx=5)
+        # Same setting as the image tab's toggle; full GrabCut takes seconds per HD keyframe
+        tk.Checkbutton(video_controls, text="Fast (multi-res)", variable=self.grabcut_multires,
+                       font=('Arial', 10), fg='white', bg='#34495e', selectcolor='#2c3e50',
+                       activebackground='#34495e').pack(side='left', padx=5)
+        
+        # Video info display
+        self.video_info = tk.Text(self.video_frame, height=15, width=80,
+                                  font=('Arial', 10), bg='#2c3e50', fg='white')
+        self.video_info.pack(padx=20, pady=20)
+        
+        # Progress bar
+        self.video_progress = ttk.Progressbar(self.video_frame, mode='determinate', maximum=100)
+        self.video_progress.pack(fill='x', padx=20, pady=10)
+    
     def setup_audio_tab(self):
         # Audio controls frame
         audio_controls = tk.Frame(self.audio_frame, bg='#34495e')
@@ -177,6 +2202,36 @@ class BackgroundRemoverApp:
                                bg='#e74c3c', fg='white', padx=20, pady=5)
         denoise_btn.pack(side='left', padx=5)
         
+        # Streaming denoise straight from disk to disk, for recordings too long to load
+        stream_btn = tk.Button(audio_controls, text="Denoise Long File",
+                               command=self.denoise_long_audio_file, font=('Arial', 12),
+                               bg='#8e44ad', fg='white', padx=20, pady=5)
+        stream_btn.pack(side='left', padx=5)
+        
+        # Saved noise profiles: gate against a known room tone instead of re-estimating
+        profile_frame = tk.Frame(self.audio_frame, bg='#34495e')
+        profile_frame.pack(fill='x', padx=20)
+        tk.Label(profile_frame, text="Noise profile:", font=('Arial', 10),
+                 fg='white', bg='#34495e').pack(side='left', padx=5)
+        self.noise_profile = tk.StringVar(value=ESTIMATE_PROFILE)
+        self.profile_menu = ttk.Combobox(profile_frame, textvariable=self.noise_profile,
+                                         state='readonly', width=30)
+        self.profile_menu.pack(side='left', padx=5)
+        new_profile_btn = tk.Button(profile_frame, text="New Profile...",
+                                    command=self.create_noise_profile, font=('Arial', 10),
+                                    bg='#2980b9', fg='white', padx=10)
+        new_profile_btn.pack(side='left', padx=5)
+        self.refresh_profiles()
+        
+        # Off: the exact single-pass denoise. On: stationary gating against one shared
+        # noise estimate, spread over all cores
+        self.parallel_denoise = tk.BooleanVar(value=False)
+        parallel_check = tk.Checkbutton(profile_frame, text="Parallel (stationary noise)",
+                                        variable=self.parallel_denoise, font=('Arial', 10),
+                                        fg='white', bg='#34495e', selectcolor='#2c3e50',
+                                        activebackground='#34495e')
+        parallel_check.pack(side='left', padx=5)
+        
         # Save audio button
         save_audio_btn = tk.Button(audio_controls, text="Save Audio", 
                                   command=self.save_audio, font=('Arial', 12),
@@ -189,7 +2244,7 @@ class BackgroundRemoverApp:
         self.audio_info.pack(padx=20, pady=20)
         
         # Progress bar
-        self.audio_progress = ttk.Progressbar(self.audio_frame, mode='indeterminate')
+        self.audio_progress = ttk.Progressbar(self.audio_frame, mode='determinate', maximum=100)
         self.audio_progress.pack(fill='x', padx=20, pady=10)
     
     def upload_image(self):
@@ -214,26 +2269,12 @@ class BackgroundRemoverApp:
             messagebox.showwarning("Warning", "Please upload an image first!")
             return
         
-        def process():
-            try:
-                # Convert PIL image to bytes
-                img_byte_arr = io.BytesIO()
-                self.current_image.save(img_byte_arr, format='PNG')
-                img_bytes = img_byte_arr.getvalue()
-                
-                # Remove background using rembg
-                output = remove(img_bytes)
-                
-                # Convert back to PIL image
-                self.processed_image = Image.open(io.BytesIO(output))
-                
-                # Display processed image
-                self.root.after(0, lambda: self.display_image_on_canvas(self.processed_image, self.processed_canvas))
-                self.root.after(0, lambda: messagebox.showinfo("Success", "AI background removed successfully!"))
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to remove background: {str(e)}"))
+        def segment(image, full_size):
+            # Serve repeat requests for the same image from the result cache
+            return remove_background_cached(image, 'ai')
         
-        threading.Thread(target=process, daemon=True).start()
+        self.submit_with_preview(('ai', id(self.current_image), DEFAULT_REMBG_MODEL), "AI remove background",
+                                 segment, "AI background removed successfully!")
     
     def remove_background_basic(self):
         if not CV2_AVAILABLE:
@@ -244,54 +2285,42 @@ class BackgroundRemoverApp:
             messagebox.showwarning("Warning", "Please upload an image first!")
             return
         
-        def process():
-            try:
-                # Convert PIL to OpenCV format
-                cv_image = cv2.cvtColor(np.array(self.current_image), cv2.COLOR_RGB2BGR)
-                
-                # Simple background removal using GrabCut
-                height, width = cv_image.shape[:2]
-                
-                # Create mask
-                mask = np.zeros((height, width), np.uint8)
-                
-                # Define rectangle around the subject (simple heuristic)
-                rect = (50, 50, width-100, height-100)
-                
-                # Initialize foreground and background models
-                bgd_model = np.zeros((1, 65), np.float64)
-                fgd_model = np.zeros((1, 65), np.float64)
-                
-                # Apply GrabCut
-                cv2.grabCut(cv_image, mask, rect, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_RECT)
-                
-                # Create final mask
-                mask2 = np.where((mask == 2) | (mask == 0), 0, 1).astype('uint8')
-                
-                # Apply mask
-                result = cv_image * mask2[:, :, np.newaxis]
-                
-                # Convert back to PIL with transparency
-                result_rgb = cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
-                self.processed_image = Image.fromarray(result_rgb)
-                
-                # Add alpha channel for transparency
-                self.processed_image = self.processed_image.convert('RGBA')
-                datas = self.processed_image.getdata()
-                new_data = []
-                for item in datas:
-                    if item[0] == 0 and item[1] == 0 and item[2] == 0:
-                        new_data.append((0, 0, 0, 0))  # Transparent
-                    else:
-                        new_data.append(item)
-                self.processed_image.putdata(new_data)
-                
-                self.root.after(0, lambda: self.display_image_on_canvas(self.processed_image, self.processed_canvas))
-                self.root.after(0, lambda: messagebox.showinfo("Success", "Basic background removal completed!"))
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to remove background: {str(e)}"))
+        multires = self.grabcut_multires.get()
+        
+        def segment(image, full_size):
+            # A preview keeps the full image's margins rather than 50 px of its own
+            rect = scaled_grabcut_rect(image.size, full_size) if image.size != full_size else None
+            return remove_background_cached(image, 'grabcut', multires=multires, rect=rect)
         
-        threading.Thread(target=process, daemon=True).start()
+        self.submit_with_preview(('grabcut', id(self.current_image), multires), "Basic remove background",
+                                 segment, "Basic background removal completed!")
+    
+    def remove_large_image_background(self):
+        in_path = filedialog.askopenfilename(
+            title="Select Large Image",
+            filetypes=[("Image files", "*.tif *.tiff *.jpg *.jpeg *.png *.bmp")]
+        )
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(
+            title="Save Tiled TIFF",
+            defaultextension=".tif",
+            filetypes=[("TIFF files", "*.tif *.tiff")]
+        )
+        if not out_path:
+            return
+        
+        backend = 'ai' if REMBG_AVAILABLE else 'grabcut'
+        
+        def process(job):
+            return remove_background_large(in_path, out_path, backend=backend, progress=job.progress)
+        
+        def done(stats):
+            messagebox.showinfo("Success", f"Wrote {stats['width']}x{stats['height']} cut-out as "
+                                           f"{stats['tiles']} tiles in {stats['seconds']:.1f}s")
+        
+        self.submit_job(('large', in_path, out_path), "Large image", process, done,
+                        "Failed to remove background", unit='tiles', outputs=(out_path,))
     
     def replace_background(self):
         if not hasattr(self, 'processed_image'):
@@ -302,49 +2331,91 @@ class BackgroundRemoverApp:
             title="Select Background Image",
             filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.tiff")]
         )
-        if bg_path:
-            try:
-                background = Image.open(bg_path)
-                background = background.resize(self.processed_image.size)
-                
-                # Create composite image
-                if self.processed_image.mode != 'RGBA':
-                    self.processed_image = self.processed_image.convert('RGBA')
-                
-                composite = Image.new('RGBA', self.processed_image.size, (255, 255, 255, 255))
-                composite.paste(background, (0, 0))
-                composite.paste(self.processed_image, (0, 0), self.processed_image)
-                
-                self.processed_image = composite
-                self.display_image_on_canvas(self.processed_image, self.processed_canvas)
-                messagebox.showinfo("Success", "Background replaced successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to replace background: {str(e)}")
+        if not bg_path:
+            return
+        
+        foreground = self.processed_image
+        
+        def process(job):
+            # Premultiplied NumPy blend over a cached, resized background, off the Tk thread
+            return composite_image(foreground, bg_path)
+        
+        self.submit_job(('composite', id(foreground), bg_path), "Replace background", process,
+                        lambda result: self.show_processed_image(result, "Background replaced successfully!"),
+                        "Failed to replace background")
     
-    def display_image_on_canvas(self, image, canvas):
-        # Resize image to fit canvas
+    def remove_video_background(self):
+        in_path = filedialog.askopenfilename(
+            title="Select Video",
+            filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv *.m4v")]
+        )
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(
+            title="Save Video",
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4"), ("AVI files", "*.avi")]
+        )
+        if not out_path:
+            return
+        
+        backend = self.video_backend.get()
+        multires = self.grabcut_multires.get()
+        
+        def report(done, total):
+            if total > 0:
+                self.video_progress.configure(value=100.0 * done / total)
+        
+        def process(job):
+            return remove_video_background(in_path, out_path, backend=backend, multires=multires,
+                                           progress=job.progress)
+        
+        def done(stats):
+            stages = stats['stage_ms_per_frame']
+            info_text = f"{os.path.basename(in_path)} -> {os.path.basename(out_path)}\n"
+            info_text += f"{stats['frames']} frames in {stats['seconds']:.1f}s ({stats['fps']:.1f} fps)\n"
+            info_text += f"Segmented {stats['segmented']}, propagated {stats['propagated']}, reused {stats['reused']}\n"
+            info_text += "Per frame: " + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in stages.items()) + "\n\n"
+            
+            self.video_info.insert(tk.END, info_text)
+            messagebox.showinfo("Success", "Video background removed successfully!")
+        
+        if self.submit_job(('video', in_path, out_path), "Video", process, done, "Failed to process video",
+                           unit='frames', on_progress=report, outputs=(out_path,)):
+            self.video_progress.configure(value=0)
+    
+    def canvas_size(self, canvas):
         canvas_width = canvas.winfo_width()
         canvas_height = canvas.winfo_height()
         
         if canvas_width <= 1 or canvas_height <= 1:
-            canvas_width, canvas_height = 400, 300
-        
-        # Calculate display size maintaining aspect ratio
-        img_width, img_height = image.size
-        ratio = min(canvas_width/img_width, canvas_height/img_height)
-        new_width = int(img_width * ratio)
-        new_height = int(img_height * ratio)
-        
-        display_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            return DEFAULT_CANVAS_SIZE
+        return canvas_width, canvas_height
+    
+    def display_copy(self, image, canvas):
+        # The canvas-sized copy is kept per canvas (with its PhotoImage), so redraws
+        # and previews do not resample the original again
+        size = self.canvas_size(canvas)
+        cached = self.display_cache.get(str(canvas))
+        if cached is not None and cached['source'] is image and cached['size'] == size:
+            return cached['image']
+        self.display_cache[str(canvas)] = {'source': image, 'size': size, 'image': fit_image(image, size), 'photo': None}
+        return self.display_cache[str(canvas)]['image']
+    
+    def display_image_on_canvas(self, image, canvas):
+        display_image = self.display_copy(image, canvas)
+        entry = self.display_cache[str(canvas)]
         
-        # Convert to PhotoImage
-        self.photo = ImageTk.PhotoImage(display_image)
+        # Convert to PhotoImage once per display copy; the entry also keeps it alive
+        if entry['photo'] is None:
+            entry['photo'] = ImageTk.PhotoImage(display_image)
         
         # Clear canvas and display image
+        canvas_width, canvas_height = entry['size']
         canvas.delete("all")
-        x = (canvas_width - new_width) // 2
-        y = (canvas_height - new_height) // 2
-        canvas.create_image(x, y, anchor='nw', image=self.photo)
+        x = (canvas_width - display_image.width) // 2
+        y = (canvas_height - display_image.height) // 2
+        canvas.create_image(x, y, anchor='nw', image=entry['photo'])
     
     def save_image(self):
         if not hasattr(self, 'processed_image'):
@@ -358,20 +2429,35 @@ class BackgroundRemoverApp:
         )
         if file_path:
             try:
-                # Convert RGBA to RGB if saving as JPEG
-                if file_path.lower().endswith('.jpg') or file_path.lower().endswith('.jpeg'):
-                    if self.processed_image.mode == 'RGBA':
-                        rgb_image = Image.new('RGB', self.processed_image.size, (255, 255, 255))
-                        rgb_image.paste(self.processed_image, mask=self.processed_image.split()[-1])
-                        rgb_image.save(file_path)
-                    else:
-                        self.processed_image.save(file_path)
-                else:
-                    self.processed_image.save(file_path)
+                save_image_file(self.processed_image, file_path)
                 messagebox.showinfo("Success", "Image saved successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save image: {str(e)}")
     
+    def refresh_profiles(self):
+        self.profile_menu['values'] = [ESTIMATE_PROFILE] + sorted(get_profile_library().entries())
+    
+    def create_noise_profile(self):
+        clip_path = filedialog.askopenfilename(
+            title="Select Noise-Only Clip",
+            filetypes=[("Audio files", "*.wav *.flac *.ogg")]
+        )
+        if not clip_path:
+            return
+        name = simpledialog.askstring("Noise Profile", "Profile name:",
+                                      initialvalue=os.path.splitext(os.path.basename(clip_path))[0])
+        if not name:
+            return
+        
+        def done(profile):
+            self.refresh_profiles()
+            self.noise_profile.set(name)
+            messagebox.showinfo("Success", f"Saved noise profile '{name}' "
+                                           f"({profile['seconds']:.1f}s at {profile['sr']} Hz)")
+        
+        self.submit_job(('noise-profile', name), "Noise profile", lambda job: create_noise_profile(name, clip_path),
+                        done, "Failed to create noise profile")
+    
     def upload_audio(self):
         if not AUDIO_AVAILABLE:
             messagebox.showerror("Error", "Audio libraries not installed!")
@@ -383,13 +2469,28 @@ class BackgroundRemoverApp:
         )
         if file_path:
             try:
-                self.current_audio, self.sample_rate = librosa.load(file_path, sr=None)
-                duration = len(self.current_audio) / self.sample_rate
+                if os.path.getsize(file_path) > IN_MEMORY_AUDIO_BYTES and file_path.lower().endswith(('.wav', '.flac', '.ogg')):
+                    # Large master: keep a mapped view only; denoising runs window by window from disk
+                    frames, self.sample_rate, subtype = open_audio_frames(file_path)
+                    n_frames, channels = frames.shape
+                    close_audio(frames)
+                    self.current_audio = None
+                    self.current_audio_path = file_path
+                    storage = f"{subtype}, processed from disk"
+                else:
+                    self.current_audio, self.sample_rate = librosa.load(file_path, sr=None, mono=False)
+                    self.current_audio_path = None
+                    n_frames = self.current_audio.shape[-1]
+                    channels = 1 if self.current_audio.ndim == 1 else self.current_audio.shape[0]
+                    storage = "decoded into memory"
+                duration = n_frames / self.sample_rate
                 
                 info_text = f"Audio loaded successfully!\n"
                 info_text += f"File: {os.path.basename(file_path)}\n"
                 info_text += f"Duration: {duration:.2f} seconds\n"
                 info_text += f"Sample Rate: {self.sample_rate} Hz\n"
+                info_text += f"Channels: {channels}\n"
+                info_text += f"Storage: {storage}\n"
                 
                 self.audio_info.delete(1.0, tk.END)
                 self.audio_info.insert(tk.END, info_text)
@@ -402,37 +2503,142 @@ class BackgroundRemoverApp:
             messagebox.showerror("Error", "Audio libraries not installed!")
             return
             
-        if self.current_audio is None:
+        if self.current_audio is None and self.current_audio_path is None:
             messagebox.showwarning("Warning", "Please upload an audio file first!")
             return
         
-        def process():
+        audio, sample_rate = self.current_audio, self.sample_rate
+        parallel = self.parallel_denoise.get()
+        profile_name = self.noise_profile.get()
+        if profile_name == ESTIMATE_PROFILE:
+            profile_name = None
+        
+        def report(done, total):
+            self.audio_progress.configure(value=100.0 * done / total if total else 0.0)
+        
+        if self.current_audio_path is not None:
+            self.remove_audio_noise_from_disk(profile_name, report)
+            return
+        
+        def process(job):
+            # Apply noise reduction, optionally spread over all cores in overlapping
+            # segments, or gate against the chosen saved profile
+            profile = get_profile_library().load(profile_name) if profile_name else None
+            return denoise_audio_cached(audio, sample_rate, progress=job.progress, profile=profile,
+                                        parallel=parallel)
+        
+        def done(result):
+            self.processed_audio = result
+            self.discard_processed_audio_file()
+            self.update_cache_status()
+            self.stop_audio_busy()
+            self.audio_progress.configure(value=100)
+            self.audio_info.insert(tk.END, "\nNoise reduction applied successfully!")
+            messagebox.showinfo("Success", "Noise removed successfully!")
+        
+        key = ('denoise', id(audio), profile_name, parallel)
+        if self.submit_job(key, "Remove noise", process, done, "Failed to remove noise",
+                           unit='blocks' if profile_name else 'segments', on_progress=report):
+            if profile_name or parallel:
+                self.audio_progress.configure(value=0)
+            else:
+                self.start_audio_busy(key)
+    
+    def start_audio_busy(self, key):
+        # Single-pass noisereduce reports no progress; animate the bar until its job ends
+        self.audio_busy_key = key
+        self.audio_progress.configure(mode='indeterminate', value=0)
+        self.audio_progress.start(UI_POLL_MS)
+    
+    def stop_audio_busy(self):
+        if self.audio_busy_key is not None:
+            self.audio_busy_key = None
+            self.audio_progress.stop()
+            self.audio_progress.configure(mode='determinate', value=0)
+    
+    def remove_audio_noise_from_disk(self, profile_name, report):
+        # Memory-mapped input, windowed denoise into a pre-sized temporary file in the
+        # same sample format; Save Audio then copies it across window by window
+        in_path = self.current_audio_path
+        fd, out_path = tempfile.mkstemp(suffix='.wav', prefix='denoised-')
+        os.close(fd)
+        
+        def process(job):
+            profile = get_profile_library().load(profile_name) if profile_name else None
+            return denoise_audio_file_streaming(in_path, out_path, progress=job.progress, profile=profile)
+        
+        def done(stats):
+            self.discard_processed_audio_file()
+            self.processed_audio_path = out_path
+            self.audio_progress.configure(value=100)
+            self.audio_info.insert(tk.END, f"\nNoise reduction applied successfully! "
+                                           f"({stats['realtime_factor']:.1f}x realtime)")
+            messagebox.showinfo("Success", "Noise removed successfully!")
+        
+        if self.submit_job(('denoise', in_path, profile_name), "Remove noise", process, done,
+                           "Failed to remove noise", unit='samples', on_progress=report, outputs=(out_path,)):
+            self.audio_progress.configure(value=0)
+        else:
+            os.remove(out_path)
+    
+    def discard_processed_audio_file(self):
+        if self.processed_audio_path is not None:
             try:
-                self.audio_progress.start()
-                
-                # Apply noise reduction
-                self.processed_audio = nr.reduce_noise(y=self.current_audio, sr=self.sample_rate)
-                
-                self.audio_progress.stop()
-                
-                info_text = self.audio_info.get(1.0, tk.END)
-                info_text += "\nNoise reduction applied successfully!"
-                
-                self.root.after(0, lambda: self.audio_info.delete(1.0, tk.END))
-                self.root.after(0, lambda: self.audio_info.insert(tk.END, info_text))
-                self.root.after(0, lambda: messagebox.showinfo("Success", "Noise removed successfully!"))
-            except Exception as e:
-                self.audio_progress.stop()
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to remove noise: {str(e)}"))
+                os.remove(self.processed_audio_path)
+            except OSError:
+                pass
+            self.processed_audio_path = None
+    
+    def denoise_long_audio_file(self):
+        if not AUDIO_AVAILABLE:
+            messagebox.showerror("Error", "Audio libraries not installed!")
+            return
         
-        threading.Thread(target=process, daemon=True).start()
+        in_path = filedialog.askopenfilename(
+            title="Select Audio File",
+            filetypes=[("Audio files", "*.wav *.flac *.ogg")]
+        )
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(
+            title="Save Denoised Audio",
+            defaultextension=".wav",
+            filetypes=[("WAV files", "*.wav"), ("FLAC files", "*.flac")]
+        )
+        if not out_path:
+            return
+        # A failed job deletes its output, which here would be the source itself
+        if os.path.exists(out_path) and os.path.samefile(out_path, in_path):
+            messagebox.showerror("Error", "Choose a different file to save the denoised audio to.")
+            return
+        
+        profile_name = self.noise_profile.get()
+        
+        def report(done, total):
+            self.audio_progress.configure(value=100.0 * done / total if total else 0.0)
+        
+        def process(job):
+            profile = get_profile_library().load(profile_name) if profile_name != ESTIMATE_PROFILE else None
+            return denoise_audio_file_streaming(in_path, out_path, progress=job.progress, profile=profile)
+        
+        def done(stats):
+            info_text = f"\nStreamed denoise: {os.path.basename(in_path)} -> {os.path.basename(out_path)}\n"
+            info_text += f"{stats['seconds_of_audio']:.1f}s of audio in {stats['seconds']:.1f}s "
+            info_text += f"({stats['realtime_factor']:.1f}x realtime)\n"
+            
+            self.audio_info.insert(tk.END, info_text)
+            messagebox.showinfo("Success", "Noise removed successfully!")
+        
+        if self.submit_job(('denoise-file', in_path, out_path), "Denoise long file", process, done,
+                           "Failed to remove noise", unit='samples', on_progress=report, outputs=(out_path,)):
+            self.audio_progress.configure(value=0)
     
     def save_audio(self):
         if not AUDIO_AVAILABLE:
             messagebox.showerror("Error", "Audio libraries not installed!")
             return
             
-        if not hasattr(self, 'processed_audio'):
+        if not hasattr(self, 'processed_audio') and self.processed_audio_path is None:
             messagebox.showwarning("Warning", "No processed audio to save!")
             return
         
@@ -441,17 +2647,263 @@ class BackgroundRemoverApp:
             defaultextension=".wav",
             filetypes=[("WAV files", "*.wav"), ("FLAC files", "*.flac")]
         )
-        if file_path:
+        if file_path and self.processed_audio_path is not None:
+            # Disk-backed result: copy window by window, off the Tk thread
+            source = self.processed_audio_path
+            self.submit_job(('save-audio', source, file_path), "Save audio",
+                            lambda job: copy_audio_file(source, file_path),
+                            lambda result: messagebox.showinfo("Success", "Audio saved successfully!"),
+                            "Failed to save audio", outputs=(file_path,))
+        elif file_path:
             try:
-                sf.write(file_path, self.processed_audio, self.sample_rate)
+                # librosa keeps audio as (channels, frames); soundfile wants (frames, channels)
+                sf.write(file_path, self.processed_audio.T, self.sample_rate)
                 messagebox.showinfo("Success", "Audio saved successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save audio: {str(e)}")
 
 def main():
+    if not TK_AVAILABLE:
+        sys.exit("tkinter is not available; use the command-line subcommands (tp.py --help)")
     root = tk.Tk()
     app = BackgroundRemoverApp(root)
+    
+    # Once the window is up, load the heavy modules and the model off the Tk thread
+    root.after(200, lambda: app.scheduler.submit('prefetch', "Loading models",
+                                                 lambda job: prefetch_modules(DEFAULT_REMBG_MODEL)))
+    
+    def on_close():
+        app.scheduler.shutdown()
+        app.discard_processed_audio_file()
+        root.destroy()
+        # The pool's threads are not daemons; a long job would otherwise keep the process alive
+        os._exit(0)
+    
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
+def cli_main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Background & Music Remover (headless mode)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    batch_parser = subparsers.add_parser('batch-remove', help="Remove image backgrounds in bulk")
+    batch_parser.add_argument('inputs', nargs='+', help="Image files and/or directories of images")
+    batch_parser.add_argument('-o', '--output', required=True, help="Directory for the PNG results")
+    batch_parser.add_argument('-m', '--model', default=DEFAULT_REMBG_MODEL, help="rembg model name")
+    batch_parser.add_argument('-w', '--workers', type=int, default=None,
+                              help="Worker processes (default: one per CPU core)")
+    
+    stream_parser = subparsers.add_parser('denoise-stream', help="Denoise a long recording block by block")
+    stream_parser.add_argument('input', help="Input audio file (WAV/FLAC/OGG)")
+    stream_parser.add_argument('output', nargs='?', help="Output audio file (same format as the input where possible)")
+    stream_parser.add_argument('--in-place', action='store_true',
+                               help="Overwrite the input (uncompressed WAV only) instead of writing a new file")
+    stream_parser.add_argument('--noise-clip', help="Audio file containing only background noise")
+    stream_parser.add_argument('--block-seconds', type=float, default=DEFAULT_STREAM_BLOCK_SECONDS)
+    stream_parser.add_argument('--overlap-seconds', type=float, default=DEFAULT_STREAM_OVERLAP_SECONDS)
+    stream_parser.add_argument('--profile', help="Saved noise profile to gate against (see noise-profile)")
+    
+    profile_parser = subparsers.add_parser('noise-profile', help="Manage the library of saved noise profiles")
+    profile_subparsers = profile_parser.add_subparsers(dest='action', required=True)
+    profile_create = profile_subparsers.add_parser('create', help="Measure a profile from a noise-only clip")
+    profile_create.add_argument('name')
+    profile_create.add_argument('clip', help="Audio file containing only background noise")
+    profile_create.add_argument('--clip-seconds', type=float, default=None,
+                                help="Use only the quietest stretch of this length")
+    profile_subparsers.add_parser('list', help="List saved profiles")
+    profile_delete = profile_subparsers.add_parser('delete', help="Delete a saved profile")
+    profile_delete.add_argument('name')
+    
+    denoise_batch_parser = subparsers.add_parser('denoise-batch', help="Denoise many recordings with one saved profile")
+    denoise_batch_parser.add_argument('inputs', nargs='+', help="Audio files and/or directories (WAV/FLAC/OGG)")
+    denoise_batch_parser.add_argument('-o', '--output', required=True, help="Directory for the results")
+    denoise_batch_parser.add_argument('-p', '--profile', required=True, help="Saved noise profile name")
+    denoise_batch_parser.add_argument('-w', '--workers', type=int, default=None)
+    
+    video_parser = subparsers.add_parser('video-remove', help="Remove the background from a video")
+    video_parser.add_argument('input', help="Input video file")
+    video_parser.add_argument('output', help="Output video file (.mp4 or .avi)")
+    video_parser.add_argument('--backend', choices=['ai', 'grabcut'], default='ai')
+    video_parser.add_argument('-m', '--model', default=DEFAULT_REMBG_MODEL, help="rembg model name")
+    video_parser.add_argument('--color', default='0,255,0', help="Replacement background colour as R,G,B")
+    video_parser.add_argument('--background-image', help="Replacement background image (overrides --color)")
+    video_parser.add_argument('--reuse-threshold', type=float, default=DEFAULT_MASK_REUSE_THRESHOLD,
+                              help="Largest change of any 16x16 cell (0-255) below which the last mask is reused")
+    video_parser.add_argument('--propagate-threshold', type=float, default=DEFAULT_MASK_PROPAGATE_THRESHOLD,
+                              help="GrabCut only: below this change the last mask is refined instead of recomputed")
+    video_parser.add_argument('--multires', action='store_true',
+                              help="GrabCut only: coarse-to-fine GrabCut on keyframes (much faster at HD)")
+    video_parser.add_argument('--max-reuse', type=int, default=DEFAULT_MASK_MAX_REUSE,
+                              help="Force a fresh segmentation after this many reused frames")
+    
+    large_parser = subparsers.add_parser('large-remove', help="Tiled background removal for very large images")
+    large_parser.add_argument('input', help="Input image (TIFF scans are memory-mapped)")
+    large_parser.add_argument('output', help="Output tiled BigTIFF (.tif)")
+    large_parser.add_argument('--backend', choices=['ai', 'grabcut'], default='ai')
+    large_parser.add_argument('-m', '--model', default=DEFAULT_REMBG_MODEL, help="rembg model name")
+    large_parser.add_argument('--working-size', type=int, default=None,
+                              help=f"Longest side of the copy the mask is computed on "
+                                   f"(default: {DEFAULT_WORKING_SIZE} for ai, {DEFAULT_GRABCUT_WORKING_SIZE} for grabcut)")
+    large_parser.add_argument('--tile', type=int, default=DEFAULT_LARGE_TILE, help="Tile edge in pixels (multiple of 16)")
+    
+    composite_parser = subparsers.add_parser('composite', help="Place cut-outs onto new backgrounds")
+    composite_parser.add_argument('foregrounds', nargs='+', help="RGBA cut-outs (files and/or directories)")
+    composite_parser.add_argument('-b', '--backgrounds', nargs='+', required=True,
+                                  help="Background images (files and/or directories)")
+    composite_parser.add_argument('-o', '--output', required=True, help="Directory for the composites")
+    composite_parser.add_argument('--format', choices=['png', 'jpg'], default='png')
+    composite_parser.add_argument('-w', '--workers', type=int, default=None)
+    
+    manifest_parser = subparsers.add_parser('batch-manifest',
+                                            help="Run a manifest of image and audio jobs, resumably")
+    manifest_parser.add_argument('manifest', help="JSON lines or .csv with op, input and output per item")
+    manifest_parser.add_argument('-w', '--workers', type=int, default=None,
+                                 help="Concurrent items (default: one per CPU core)")
+    manifest_parser.add_argument('--checkpoint', help="Checkpoint file (default: MANIFEST.checkpoint.jsonl)")
+    manifest_parser.add_argument('--summary', help="Timing summary file (default: MANIFEST.summary.json)")
+    manifest_parser.add_argument('--retry-failed', action='store_true',
+                                 help="Run items that failed on an earlier run again")
+    
+    cache_parser = subparsers.add_parser('cache', help="Show or clear the result cache")
+    cache_parser.add_argument('--clear', action='store_true', help="Delete every cached result")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'batch-remove':
+        def report(done, total, path, error):
+            if error is not None:
+                print(f"[{done}/{total}] FAILED {path}: {error}", file=sys.stderr)
+            elif done % 50 == 0 or done == total:
+                print(f"[{done}/{total}] processed")
+    
+        try:
+            stats = batch_remove_backgrounds(args.inputs, args.output, model_name=args.model,
+                                             workers=args.workers, progress=report)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Processed {stats['processed']} images with {stats['workers']} workers "
+              f"in {stats['seconds']:.2f}s ({stats['images_per_sec']:.2f} images/sec)")
+        return 1 if stats['failed'] else 0
+    
+    if args.command == 'video-remove':
+        color = tuple(int(v) for v in args.color.split(','))
+        stats = remove_video_background(args.input, args.output, backend=args.backend,
+                                        model_name=args.model, background_color=color,
+                                        background_image=args.background_image,
+                                        multires=args.multires, reuse_threshold=args.reuse_threshold,
+                                        propagate_threshold=args.propagate_threshold, max_reuse=args.max_reuse)
+        print(f"{stats['frames']} frames in {stats['seconds']:.2f}s ({stats['fps']:.1f} fps); "
+              f"segmented {stats['segmented']}, propagated {stats['propagated']}, reused {stats['reused']}")
+        for stage, ms in stats['stage_ms_per_frame'].items():
+            print(f"  {stage:>9}: {ms:.2f} ms/frame")
+        return 0
+    
+    if args.command == 'large-remove':
+        try:
+            stats = remove_background_large(args.input, args.output, backend=args.backend, model_name=args.model,
+                                            working_size=args.working_size, tile=args.tile)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"{stats['width']}x{stats['height']} -> {stats['tiles']} tiles "
+              f"(mask at 1/{stats['working_factor']} scale) in {stats['seconds']:.2f}s")
+        return 0
+    
+    if args.command == 'composite':
+        try:
+            stats = composite_batch(collect_image_paths(args.foregrounds), collect_image_paths(args.backgrounds),
+                                    args.output, workers=args.workers, image_format=args.format)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Wrote {stats['composites']} composites in {stats['seconds']:.2f}s "
+              f"({stats['composites_per_sec']:.1f} composites/sec)")
+        return 0
+    
+    if args.command == 'batch-manifest':
+        def report(done, total, item, error):
+            if error is not None:
+                print(f"[{done}/{total}] FAILED {item['id']}: {error}", file=sys.stderr)
+            elif done % 50 == 0 or done == total:
+                print(f"[{done}/{total}] processed")
+        
+        try:
+            summary = run_manifest(args.manifest, workers=args.workers, checkpoint_path=args.checkpoint,
+                                   summary_path=args.summary, retry_failed=args.retry_failed, progress=report)
+        except ValueError as e:
+            parser.error(str(e))
+        run = summary['run']
+        print(f"Processed {run['processed']} items ({run['failed']} failed) in {run['seconds']:.2f}s "
+              f"({run['items_per_sec']:.2f} items/sec); skipped {run['skipped']} from earlier runs")
+        for op, stats in sorted(summary['ops'].items()):
+            if stats['done']:
+                print(f"  {op:>8}: {stats['done']} done, {stats['failed']} failed, "
+                      f"p50 {stats['p50_seconds']:.2f}s, p95 {stats['p95_seconds']:.2f}s")
+            else:
+                print(f"  {op:>8}: {stats['failed']} failed")
+        print(f"Summary written to {run['summary']}")
+        return 1 if summary['failed'] else 0
+    
+    if args.command == 'cache':
+        cache = get_result_cache()
+        if args.clear:
+            cache.clear()
+        stats = cache.stats()
+        print(f"Cache directory: {cache.directory}")
+        print(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Evictions: {stats['evictions']}")
+        print(f"Entries: {stats['entries']}  Size: {stats['bytes'] / 1024 ** 2:.1f} MB "
+              f"of {stats['max_bytes'] / 1024 ** 2:.0f} MB")
+        return 0
+    
+    if args.command == 'denoise-stream':
+        if (args.output is None) == (not args.in_place):
+            parser.error("denoise-stream needs either an output file or --in-place")
+        if args.output is not None and os.path.exists(args.output) and os.path.samefile(args.output, args.input):
+            parser.error("the output is the input file; use --in-place to overwrite it")
+        
+        noise_clip = None
+        if args.noise_clip:
+            noise_clip, _ = sf.read(args.noise_clip, dtype='float32', always_2d=True)
+            noise_clip = noise_clip.T
+        
+        profile = get_profile_library().load(args.profile) if args.profile else None
+        stats = denoise_audio_file_streaming(args.input, args.output, noise_clip=noise_clip,
+                                             block_seconds=args.block_seconds,
+                                             overlap_seconds=args.overlap_seconds, profile=profile)
+        print(f"Denoised {stats['seconds_of_audio']:.1f}s of audio in {stats['seconds']:.2f}s "
+              f"({stats['realtime_factor']:.1f}x realtime)")
+        return 0
+
+    if args.command == 'noise-profile':
+        library = get_profile_library()
+        if args.action == 'create':
+            profile = create_noise_profile(args.name, args.clip, args.clip_seconds)
+            print(f"Saved profile {args.name!r} ({profile['seconds']:.1f}s of noise at {profile['sr']} Hz)")
+        elif args.action == 'delete':
+            if not library.delete(args.name):
+                print(f"No noise profile named {args.name!r}", file=sys.stderr)
+                return 1
+        else:
+            print(f"Profiles in {library.directory}:")
+            for name, entry in sorted(library.entries().items()):
+                print(f"  {name}: {entry['sr']} Hz, {entry['seconds']:.1f}s from {entry['source']} ({entry['created']})")
+        return 0
+    
+    if args.command == 'denoise-batch':
+        def report(done, total, path, error):
+            if error is not None:
+                print(f"[{done}/{total}] FAILED {path}: {error}", file=sys.stderr)
+            elif done % 50 == 0 or done == total:
+                print(f"[{done}/{total}] processed")
+        
+        profile = get_profile_library().load(args.profile)
+        try:
+            stats = denoise_batch_with_profile(args.inputs, args.output, profile, workers=args.workers, progress=report)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Denoised {stats['files'] - stats['failed']} files, {stats['seconds_of_audio']:.1f}s of audio "
+              f"in {stats['seconds']:.2f}s ({stats['audio_seconds_per_sec']:.1f} audio-seconds/sec)")
+        return 1 if stats['failed'] else 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli_main())
     main()
\ No newline at end of file